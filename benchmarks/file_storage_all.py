@@ -0,0 +1,61 @@
+#!/usr/bin/python3
+"""Benchmark of FileStorage.all(cls) against a full scan of __objects.
+
+The store is filled with a realistic mix of objects (few States and
+Amenities, many Places and Reviews) and the time of ``all(State)`` is
+compared with the linear scan FileStorage used before the class index.
+
+Usage:
+    python3 -m benchmarks.file_storage_all [size ...]
+
+    Sizes default to 10000 100000 1000000 objects.
+"""
+import sys
+from timeit import timeit
+from models import storage
+from models.amenity import Amenity
+from models.city import City
+from models.place import Place
+from models.review import Review
+from models.state import State
+from models.user import User
+
+
+# Share of each class in the generated store, in percent.
+mix = [(State, 1), (Amenity, 1), (City, 8), (User, 20), (Place, 30),
+       (Review, 40)]
+
+
+def scan_all(cls):
+    """Returns the objects of cls the way FileStorage.all(cls) used to."""
+    my_dict = {}
+    for key, value in storage.all().items():
+        if type(value) == cls:
+            my_dict[key] = value
+    return my_dict
+
+
+def fill(size):
+    """Replaces the content of storage with size generated objects."""
+    storage.all().clear()
+    storage._FileStorage__by_class.clear()
+    for cls, share in mix:
+        for i in range(size * share // 100):
+            storage.new(cls())
+
+
+def main(sizes):
+    """Prints the time of both lookups for every store size."""
+    print("{:>10} {:>12} {:>12} {:>9}".format(
+        "objects", "scan (ms)", "index (ms)", "speedup"))
+    for size in sizes:
+        fill(size)
+        runs = 20
+        scan = timeit(lambda: scan_all(State), number=runs) / runs
+        index = timeit(lambda: storage.all(State), number=runs) / runs
+        print("{:>10} {:>12.3f} {:>12.3f} {:>8.0f}x".format(
+            size, scan * 1000, index * 1000, scan / index))
+
+
+if __name__ == "__main__":
+    main([int(arg) for arg in sys.argv[1:]] or [10000, 100000, 1000000])
@@ -0,0 +1,45 @@
+#!/usr/bin/python3
+"""Benchmark of FileStorage.close(), as run after every web request.
+
+For each store size the store is saved once, then close() is timed when
+the file must be parsed again (``reload(force=True)``, what close() did
+before) and when the file did not change since it was written.
+
+Usage:
+    python3 -m benchmarks.file_storage_close [size ...]
+
+    Sizes default to 1000 10000 100000 objects.
+"""
+import os
+import sys
+from time import perf_counter
+from models import storage
+from models.place import Place
+
+
+def main(sizes, rounds=5):
+    """Prints the mean time of a forced reload and of an unchanged close."""
+    print("{:>10} {:>14} {:>16}".format(
+        "objects", "reparse (ms)", "unchanged (ms)"))
+    for size in sizes:
+        storage.all().clear()
+        storage._FileStorage__by_class.clear()
+        storage._FileStorage__encoded.clear()
+        for i in range(size):
+            storage.new(Place(name="Place {}".format(i)))
+        storage.save()
+        start = perf_counter()
+        for i in range(rounds):
+            storage.reload(force=True)
+        forced = (perf_counter() - start) / rounds
+        start = perf_counter()
+        for i in range(rounds):
+            storage.close()
+        unchanged = (perf_counter() - start) / rounds
+        print("{:>10} {:>14.2f} {:>16.3f}".format(
+            size, forced * 1000, unchanged * 1000))
+    os.remove('file.json')
+
+
+if __name__ == "__main__":
+    main([int(arg) for arg in sys.argv[1:]] or [1000, 10000, 100000])
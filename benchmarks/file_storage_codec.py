@@ -0,0 +1,68 @@
+#!/usr/bin/python3
+"""Benchmark of the FileStorage codecs.
+
+A mix of generated records is encoded and written to memory with each
+codec, then streamed back; the encode and decode throughput and the size
+of the file are printed.
+
+Usage:
+    python3 -m benchmarks.file_storage_codec [records]
+
+    The number of records defaults to 100000.
+"""
+import io
+import sys
+from time import perf_counter
+from models.amenity import Amenity
+from models.city import City
+from models.engine.codec import codecs
+from models.place import Place
+from models.review import Review
+from models.state import State
+from models.user import User
+
+
+def records(count):
+    """Returns count (key, record) pairs of the usual classes."""
+    state = State(name="California")
+    city = City(name="San Francisco", state_id=state.id)
+    user = User(email="owner@hbnb.io", password="pwd", first_name="Ada",
+                last_name="Lovelace")
+    templates = [
+        state, city, user, Amenity(name="Wifi"),
+        Place(city_id=city.id, user_id=user.id, name="Loft",
+              description="A bright loft in the heart of the city",
+              number_rooms=2, number_bathrooms=1, max_guest=4,
+              price_by_night=120, latitude=37.77, longitude=-122.43),
+        Review(place_id=city.id, user_id=user.id, text="Great stay!")]
+    pairs = []
+    for i in range(count):
+        record = templates[i % len(templates)].to_dict()
+        record['id'] = '{:08x}-0000-4000-8000-{:012x}'.format(i, i)
+        pairs.append((record['__class__'] + '.' + record['id'], record))
+    return pairs
+
+
+def main(count):
+    """Prints the throughput and file size of each codec."""
+    pairs = records(count)
+    print("{:>8} {:>16} {:>16} {:>10}".format(
+        "codec", "encode (rec/s)", "decode (rec/s)", "size (MB)"))
+    for codec in codecs.values():
+        f = io.BytesIO() if codec.binary else io.StringIO()
+        start = perf_counter()
+        codec.write(f, [codec.encode(key, rec) for key, rec in pairs])
+        encode = perf_counter() - start
+        data = f.getvalue()
+        size = len(data if codec.binary else data.encode('utf-8'))
+        f.seek(0)
+        start = perf_counter()
+        for item in codec.iter_items(f):
+            pass
+        decode = perf_counter() - start
+        print("{:>8} {:>16.0f} {:>16.0f} {:>10.1f}".format(
+            codec.name, count / encode, count / decode, size / (1 << 20)))
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 100000)
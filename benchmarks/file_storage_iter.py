@@ -0,0 +1,65 @@
+#!/usr/bin/python3
+"""Benchmark of the peak memory of a pass over the whole store.
+
+A storage file of the requested size is generated in a temporary
+directory, then read in fresh interpreters with a lazy FileStorage and
+with MmapStorage. Each one counts the places with more than two rooms,
+once through all() and once through iter(), and prints its peak RSS.
+
+Usage:
+    python3 -m benchmarks.file_storage_iter [megabytes]
+
+    The file size defaults to 50 MB.
+"""
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+from time import perf_counter
+from benchmarks.file_storage_reload import generate
+
+
+def run(engine, mode):
+    """Reads file.json of the parent directory and prints the results."""
+    from models.engine.file_storage import FileStorage
+    from models.engine.mmap_storage import MmapStorage
+
+    os.chdir('..')
+    storage = FileStorage(lazy=True) if engine == 'lazy' else MmapStorage()
+    storage.reload()
+    start = perf_counter()
+    if mode == 'all':
+        objs = storage.all('Place').values()
+    else:
+        objs = storage.iter('Place')
+    count = sum(1 for obj in objs if obj.number_rooms > 2)
+    elapsed = perf_counter() - start
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    print("{:>8} {:>6} {:>10} {:>14.0f} {:>10.1f}".format(
+        engine, mode, count, peak / 1024, elapsed))
+
+
+def main(megabytes):
+    """Generates the file and reads it with each engine and method."""
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    env = dict(os.environ, PYTHONPATH=root)
+    with tempfile.TemporaryDirectory() as tmp:
+        generate(os.path.join(tmp, 'file.json'), megabytes << 20)
+        os.mkdir(os.path.join(tmp, 'start'))
+        print("{:>8} {:>6} {:>10} {:>14} {:>10}".format(
+            "engine", "method", "objects", "peak RSS (MB)", "time (s)"))
+        for engine in ('lazy', 'mmap'):
+            for mode in ('all', 'iter'):
+                subprocess.run([sys.executable, '-m',
+                                'benchmarks.file_storage_iter', '--run',
+                                engine, mode],
+                               cwd=os.path.join(tmp, 'start'), env=env,
+                               check=True)
+
+
+if __name__ == "__main__":
+    if sys.argv[1:2] == ['--run']:
+        run(sys.argv[2], sys.argv[3])
+    else:
+        main(int(sys.argv[1]) if len(sys.argv) > 1 else 50)
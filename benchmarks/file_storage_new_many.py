@@ -0,0 +1,51 @@
+#!/usr/bin/python3
+"""Benchmark of loading seed data into FileStorage.
+
+For each count, Places are stored the way seed scripts did, with one
+BaseModel.save() per object, which rewrites the file every time, and with
+a single storage.new_many() call. The per-object saves are only run up to
+max_each objects, past which they take too long.
+
+Usage:
+    python3 -m benchmarks.file_storage_new_many [count ...]
+
+    Counts default to 1000 10000 100000 objects.
+"""
+import os
+import sys
+from time import perf_counter
+from models import storage
+from models.place import Place
+
+
+def clear():
+    """Empties the storage."""
+    storage.all().clear()
+    storage._FileStorage__by_class.clear()
+    storage._FileStorage__encoded.clear()
+    storage._FileStorage__pending.clear()
+
+
+def main(counts, max_each=10000):
+    """Prints the time of the per-object saves and of new_many()."""
+    print("{:>10} {:>16} {:>16}".format(
+        "objects", "save() each (s)", "new_many() (s)"))
+    for count in counts:
+        each = '-'
+        if count <= max_each:
+            clear()
+            start = perf_counter()
+            for i in range(count):
+                Place(name="Place {}".format(i)).save()
+            each = "{:.2f}".format(perf_counter() - start)
+        clear()
+        start = perf_counter()
+        storage.new_many(Place(name="Place {}".format(i))
+                         for i in range(count))
+        print("{:>10} {:>16} {:>16.2f}".format(
+            count, each, perf_counter() - start))
+    os.remove('file.json')
+
+
+if __name__ == "__main__":
+    main([int(arg) for arg in sys.argv[1:]] or [1000, 10000, 100000])
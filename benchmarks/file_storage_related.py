@@ -0,0 +1,95 @@
+#!/usr/bin/python3
+"""Benchmark of the file mode relationships over a whole page.
+
+For each size, that many states with ten cities each are stored, then
+``state.cities`` is read for every state, as 8-cities_by_states.html
+does; likewise that many places with two reviews and two of twenty
+amenities each, then ``place.reviews`` and ``place.amenities`` are read
+for every place, as 100-hbnb.html does. The scans the properties used to
+make are timed against the foreign key index of FileStorage and the
+amenity id sets.
+
+Usage:
+    python3 -m benchmarks.file_storage_related [size ...]
+
+    Sizes default to 100 1000.
+"""
+import sys
+from time import perf_counter
+from models import storage
+from models.amenity import Amenity
+from models.city import City
+from models.place import Place
+from models.review import Review
+from models.state import State
+
+
+def scan_cities(state):
+    """Returns the cities of a state the way State.cities used to."""
+    return [city for city in storage.all(City).values()
+            if city.state_id == state.id]
+
+
+def scan_place(place):
+    """Returns the reviews and amenities of a place the way Place did."""
+    reviews = [review for review in storage.all(Review).values()
+               if review.place_id == place.id]
+    amenity_ids = list(place.amenity_ids)
+    amenities = [amenity for amenity in storage.all(Amenity).values()
+                 if amenity.id in amenity_ids]
+    return reviews, amenities
+
+
+def clear():
+    """Empties the storage."""
+    storage.all().clear()
+    storage._FileStorage__by_class.clear()
+    storage._FileStorage__refs.clear()
+    storage._FileStorage__ref_keys.clear()
+
+
+def time(function, objs):
+    """Returns the time function takes over every object."""
+    start = perf_counter()
+    for obj in objs:
+        function(obj)
+    return perf_counter() - start
+
+
+def main(sizes):
+    """Prints the time of a page of relationships with and without index."""
+    print("{:>14} {:>8} {:>10} {:>12} {:>8}".format(
+        "page", "objects", "scan (s)", "index (s)", "speedup"))
+    for size in sizes:
+        clear()
+        states = [State(name="State {}".format(i)) for i in range(size)]
+        for state in states:
+            storage.new(state)
+            for i in range(10):
+                storage.new(City(name="City {}".format(i),
+                                 state_id=state.id))
+        scanned = time(scan_cities, states)
+        indexed = time(lambda state: state.cities, states)
+        print("{:>14} {:>8} {:>10.3f} {:>12.4f} {:>7.0f}x".format(
+            "state.cities", size, scanned, indexed, scanned / indexed))
+
+        clear()
+        amenities = [Amenity(name="Amenity {}".format(i)) for i in range(20)]
+        for amenity in amenities:
+            storage.new(amenity)
+        places = [Place(name="Place {}".format(i)) for i in range(size)]
+        for i, place in enumerate(places):
+            storage.new(place)
+            place.amenities = amenities[i % 20]
+            place.amenities = amenities[(i + 1) % 20]
+            for j in range(2):
+                storage.new(Review(place_id=place.id, text="Nice"))
+        scanned = time(scan_place, places)
+        indexed = time(lambda place: (place.reviews, place.amenities),
+                       places)
+        print("{:>14} {:>8} {:>10.3f} {:>12.4f} {:>7.0f}x".format(
+            "place", size, scanned, indexed, scanned / indexed))
+
+
+if __name__ == "__main__":
+    main([int(arg) for arg in sys.argv[1:]] or [100, 1000])
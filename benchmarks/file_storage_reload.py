@@ -0,0 +1,95 @@
+#!/usr/bin/python3
+"""Benchmark of the peak memory of FileStorage.reload().
+
+A storage file of the requested size is generated in a temporary
+directory, then loaded in a fresh interpreter twice: once the way reload()
+used to (json.load of the whole file, then one model per record) and once
+with the streaming FileStorage.reload(). The peak RSS and the time of each
+run are printed, along with a lazy reload that keeps the records
+undecoded until their class is requested.
+
+Usage:
+    python3 -m benchmarks.file_storage_reload [megabytes]
+
+    The file size defaults to 500 MB.
+"""
+import json
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+from datetime import datetime
+from time import perf_counter
+from uuid import uuid4
+
+
+def generate(path, size):
+    """Writes a storage file of about size bytes of Place records."""
+    now = datetime.now().isoformat()
+    with open(path, 'w') as f:
+        f.write('{')
+        written = 0
+        while written < size:
+            place_id = str(uuid4())
+            text = json.dumps("Place." + place_id) + ': ' + json.dumps({
+                "id": place_id, "created_at": now, "updated_at": now,
+                "__class__": "Place", "city_id": str(uuid4()),
+                "user_id": str(uuid4()), "name": "Place " + place_id[:8],
+                "description": "A place to stay " * 4, "number_rooms": 3,
+                "number_bathrooms": 1, "max_guest": 6,
+                "price_by_night": 120, "latitude": 37.77,
+                "longitude": -122.43})
+            f.write((', ' if written else '') + text)
+            written += len(text) + 2
+        f.write('}')
+
+
+def run(mode):
+    """Loads file.json of the parent directory and prints the results."""
+    from models import storage
+    from models.engine.file_storage import FileStorage
+    from models.place import Place
+
+    # models reloads file.json on import, so the child process starts in
+    # an empty directory and only then moves next to the generated file.
+    os.chdir('..')
+    start = perf_counter()
+    if mode == 'json':
+        with open('file.json') as f:
+            temp = json.load(f)
+            for key, val in temp.items():
+                storage.all()[key] = Place(**val)
+    elif mode == 'lazy':
+        FileStorage(lazy=True).reload()
+    else:
+        storage.reload()
+    elapsed = perf_counter() - start
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    count = sum(len(raw) for raw in storage._FileStorage__raw.values())
+    print("{:>10} {:>10} {:>14.0f} {:>10.1f}".format(
+        mode, count + len(storage._FileStorage__objects), peak / 1024,
+        elapsed))
+
+
+def main(megabytes):
+    """Generates the file and loads it with both implementations."""
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    env = dict(os.environ, PYTHONPATH=root)
+    with tempfile.TemporaryDirectory() as tmp:
+        generate(os.path.join(tmp, 'file.json'), megabytes << 20)
+        os.mkdir(os.path.join(tmp, 'start'))
+        print("{:>10} {:>10} {:>14} {:>10}".format(
+            "reload", "objects", "peak RSS (MB)", "time (s)"))
+        for mode in ('json', 'stream', 'lazy'):
+            subprocess.run([sys.executable, '-m',
+                            'benchmarks.file_storage_reload', '--run', mode],
+                           cwd=os.path.join(tmp, 'start'), env=env,
+                           check=True)
+
+
+if __name__ == "__main__":
+    if sys.argv[1:2] == ['--run']:
+        run(sys.argv[2])
+    else:
+        main(int(sys.argv[1]) if len(sys.argv) > 1 else 500)
@@ -0,0 +1,43 @@
+#!/usr/bin/python3
+"""Benchmark of FileStorage.save() after a single change.
+
+For each store size the whole store is saved once, then one object is
+changed and saved again. The second save only encodes the changed object,
+so its cost is what a console update pays.
+
+Usage:
+    python3 -m benchmarks.file_storage_save [size ...]
+
+    Sizes default to 10000 100000 objects.
+"""
+import os
+import sys
+from time import perf_counter
+from models import storage
+from models.place import Place
+
+
+def main(sizes):
+    """Prints the time of a full save and of a one-change save."""
+    print("{:>10} {:>14} {:>14}".format(
+        "objects", "full save (s)", "1 change (s)"))
+    for size in sizes:
+        storage.all().clear()
+        storage._FileStorage__by_class.clear()
+        storage._FileStorage__encoded.clear()
+        places = [Place(name="Place {}".format(i)) for i in range(size)]
+        for place in places:
+            storage.new(place)
+        start = perf_counter()
+        storage.save()
+        full = perf_counter() - start
+        places[0].name = "Changed"
+        start = perf_counter()
+        storage.save()
+        change = perf_counter() - start
+        print("{:>10} {:>14.3f} {:>14.3f}".format(size, full, change))
+    os.remove('file.json')
+
+
+if __name__ == "__main__":
+    main([int(arg) for arg in sys.argv[1:]] or [10000, 100000])
@@ -0,0 +1,77 @@
+#!/usr/bin/python3
+"""Benchmark of the memory of a web worker per storage mode.
+
+A storage file of each requested size is generated in a temporary
+directory, then loaded in fresh interpreters, once with FileStorage and
+twice with the read-only MmapStorage (``HBNB_FILE_READONLY=1``): the
+first worker builds the offset index, the second finds it. Each worker
+prints its private memory, which is what every extra worker costs, once
+the storage is loaded and after reading every record once, as a listing
+page would; the decoded models are dropped after the listing.
+
+Usage:
+    python3 -m benchmarks.mmap_storage [megabytes ...]
+
+    Sizes default to 10 50 MB.
+"""
+import gc
+import os
+import subprocess
+import sys
+import tempfile
+from time import perf_counter
+from benchmarks.file_storage_reload import generate
+
+
+def memory():
+    """Returns the private memory of the process in MB."""
+    gc.collect()
+    fields = {}
+    with open('/proc/self/smaps_rollup') as f:
+        for line in f:
+            parts = line.split()
+            if len(parts) == 3:
+                fields[parts[0]] = int(parts[1])
+    return (fields['Private_Clean:'] + fields['Private_Dirty:']) / 1024
+
+
+def run(mode, size):
+    """Loads file.json of the parent directory and prints the results."""
+    from models import storage
+
+    os.chdir('..')
+    start = perf_counter()
+    storage.reload()
+    elapsed = perf_counter() - start
+    loaded = memory()
+    count = len(storage.all('Place'))
+    print("{:>8} {:>10} {:>10} {:>12.1f} {:>14.1f} {:>10.2f}".format(
+        size, mode, count, loaded, memory(), elapsed))
+
+
+def main(sizes):
+    """Generates each file and loads it in a worker of each mode."""
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    print("{:>8} {:>10} {:>10} {:>12} {:>14} {:>10}".format(
+        "MB", "storage", "objects", "loaded (MB)", "listing (MB)",
+        "reload (s)"))
+    for size in sizes:
+        with tempfile.TemporaryDirectory() as tmp:
+            generate(os.path.join(tmp, 'file.json'), size << 20)
+            os.mkdir(os.path.join(tmp, 'start'))
+            for mode, readonly in (('file', ''), ('mmap+index', '1'),
+                                   ('mmap', '1')):
+                env = dict(os.environ, PYTHONPATH=root,
+                           HBNB_FILE_READONLY=readonly)
+                subprocess.run([sys.executable, '-m',
+                                'benchmarks.mmap_storage', '--run', mode,
+                                str(size)],
+                               cwd=os.path.join(tmp, 'start'), env=env,
+                               check=True)
+
+
+if __name__ == "__main__":
+    if sys.argv[1:2] == ['--run']:
+        run(sys.argv[2], sys.argv[3])
+    else:
+        main([int(arg) for arg in sys.argv[1:]] or [10, 50])
@@ -0,0 +1,87 @@
+#!/usr/bin/python3
+"""Benchmark of the average price_by_night of the places of each state.
+
+Places spread over 50 states of 20 cities are stored in FileStorage and
+in an SQLite file, then the count and average price per state are
+computed the way the views did, by loading every Place and looping in
+Python, and with ``query(Place).aggregate('state_id', ...)``.
+
+Usage:
+    python3 -m benchmarks.query_aggregate [places]
+
+    The number of places defaults to 100000.
+"""
+import os
+import random
+import sys
+import tempfile
+from time import perf_counter
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from models import storage
+from models.city import City
+from models.engine.db_storage import ensure_schema
+from models.engine.query import DBQuery
+from models.place import Place
+from models.state import State
+
+
+def loop(places, cities):
+    """Returns the count and average price per state, in Python."""
+    totals = {}
+    for place in places:
+        state_id = cities[place.city_id].state_id
+        count, total = totals.get(state_id, (0, 0))
+        totals[state_id] = (count + 1, total + place.price_by_night)
+    return {key: (count, total / count)
+            for key, (count, total) in totals.items()}
+
+
+def timed(run):
+    """Returns the time of run in ms."""
+    start = perf_counter()
+    run()
+    return (perf_counter() - start) * 1000
+
+
+def main(count):
+    """Prints the time of the loop and of aggregate() per engine."""
+    states = [State(name="State {}".format(i)) for i in range(50)]
+    cities = [City(name="City {}".format(i), state_id=states[i % 50].id)
+              for i in range(1000)]
+    places = [Place(name="Place {}".format(i), user_id="u",
+                    city_id=random.choice(cities).id,
+                    price_by_night=random.randint(20, 500))
+              for i in range(count)]
+    print("{:>8} {:>12} {:>16}".format("engine", "loop (ms)",
+                                       "aggregate (ms)"))
+    storage.new_many(states + cities + places)
+    os.remove('file.json')
+    print("{:>8} {:>12.1f} {:>16.1f}".format(
+        "file",
+        timed(lambda: loop(storage.all(Place).values(),
+                           {city.id: city for city in
+                            storage.all(City).values()})),
+        timed(lambda: storage.query(Place).aggregate(
+            'state_id', ['price_by_night'], ['avg']))))
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = create_engine('sqlite:///' + os.path.join(tmp, 'hbnb.db'))
+        ensure_schema(engine)
+        session = sessionmaker(bind=engine)()
+        session.add_all(State(**obj.to_dict()) for obj in states)
+        session.add_all(City(**obj.to_dict()) for obj in cities)
+        session.add_all(Place(**obj.to_dict()) for obj in places)
+        session.commit()
+        session.close()
+        print("{:>8} {:>12.1f} {:>16.1f}".format(
+            "sqlite",
+            timed(lambda: loop(session.query(Place).all(),
+                               {city.id: city for city in
+                                session.query(City)})),
+            timed(lambda: DBQuery(session, Place).aggregate(
+                'state_id', ['price_by_night'], ['avg']))))
+        session.close()
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if sys.argv[1:] else 100000)
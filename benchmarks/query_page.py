@@ -0,0 +1,62 @@
+#!/usr/bin/python3
+"""Benchmark of deep pages, with OFFSET and with keyset pagination.
+
+States are stored in an SQLite file and in FileStorage, then the page of
+100 states at each depth is read by skipping the rows before it
+(``order_by('name', 'id').offset(depth)``) and by following a cursor
+(``page(100, cursor)``). The mean time of a page is printed.
+
+Usage:
+    python3 -m benchmarks.query_page [states]
+
+    The number of states defaults to 100000.
+"""
+import os
+import sys
+import tempfile
+from time import perf_counter
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from models import storage
+from models.engine.db_storage import ensure_schema
+from models.engine.query import DBQuery
+from models.state import State
+
+
+def timed(run, rounds=10):
+    """Returns the mean time of run in ms."""
+    start = perf_counter()
+    for i in range(rounds):
+        run()
+    return (perf_counter() - start) / rounds * 1000
+
+
+def main(count):
+    """Prints the time of a page at growing depths."""
+    names = ["State {:06d}".format(i) for i in range(count)]
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = create_engine('sqlite:///' + os.path.join(tmp, 'hbnb.db'))
+        ensure_schema(engine)
+        session = sessionmaker(bind=engine)()
+        session.add_all(State(name=name) for name in names)
+        session.commit()
+        storage.new_many(State(name=name) for name in names)
+        os.remove('file.json')
+        print("{:>8} {:>14} {:>12} {:>14} {:>12}".format(
+            "depth", "sqlite offset", "sqlite seek", "file offset",
+            "file seek"))
+        for depth in (0, count // 10, count // 2, count - 100):
+            times = []
+            for query in (DBQuery(session, State), storage.query(State)):
+                # The cursor after the first depth states.
+                cursor = depth and query.page(depth).next
+                times.append(timed(lambda: query.order_by(
+                    'name', 'id').offset(depth).limit(100).all()))
+                times.append(timed(lambda: query.page(100, cursor)))
+            print("{:>8} {:>14.2f} {:>12.2f} {:>14.2f} {:>12.2f}".format(
+                depth, *times))
+        session.close()
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if sys.argv[1:] else 100000)
@@ -189,10 +189,9 @@ class HBNBCommand(cmd.Cmd):
                 raise NameError()
             if len(my_list) < 2:
                 raise IndexError()
-            objects = models.storage.all()
-            key = my_list[0] + '.' + my_list[1]
-            if key in objects:
-                print(objects[key])
+            obj = models.storage.get(my_list[0], my_list[1])
+            if obj is not None:
+                print(obj)
             else:
                 raise KeyError()
         except SyntaxError:
@@ -229,13 +228,12 @@ class HBNBCommand(cmd.Cmd):
             print("** instance id missing **")
             return
 
-        key = c_name + "." + c_id
-
-        try:
-            del (models.storage.all()[key])
-            models.storage.save()
-        except KeyError:
+        obj = models.storage.get(c_name, c_id)
+        if obj is None:
             print("** no instance found **")
+            return
+        models.storage.delete(obj)
+        models.storage.save()
 
     def help_destroy(self):
         """ Help information for the destroy command """
@@ -266,9 +264,8 @@ class HBNBCommand(cmd.Cmd):
     def do_count(self, args):
         """Count current number of class instances"""
         count = 0
-        for k, v in models.storage.all().items():
-            if args == k.split('.')[0]:
-                count += 1
+        if args in HBNBCommand.classes:
+            count = models.storage.count(args)
         print(count)
 
     def help_count(self):
@@ -298,11 +295,9 @@ class HBNBCommand(cmd.Cmd):
             print("** instance id missing **")
             return
 
-        # generate key from class and id
-        key = c_name + "." + c_id
-
-        # determine if key is present
-        if key not in models.storage.all():
+        # retrieve the object from storage
+        new_dict = models.storage.get(c_name, c_id)
+        if new_dict is None:
             print("** no instance found **")
             return
 
@@ -335,9 +330,6 @@ class HBNBCommand(cmd.Cmd):
 
             args = [att_name, att_val]
 
-        # retrieve dictionary of current objects
-        new_dict = models.storage.all()[key]
-
         # iterate through attr names and values
         for i, att_name in enumerate(args):
             # block only runs on even iterations
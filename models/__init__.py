@@ -6,6 +6,9 @@ from os import getenv
 if getenv('HBNB_TYPE_STORAGE') == 'db':
     from models.engine.db_storage import DBStorage
     storage = DBStorage()
+elif getenv('HBNB_FILE_READONLY', '') in ('1', 'true', 'yes'):
+    from models.engine.mmap_storage import MmapStorage
+    storage = MmapStorage()
 else:
     from models.engine.file_storage import FileStorage
     storage = FileStorage()
@@ -1,6 +1,7 @@
 #!/usr/bin/python3
 """This module defines a base class for all models in our hbnb clone"""
 import models
+import weakref
 from uuid import uuid4
 from datetime import datetime
 from sqlalchemy.ext.declarative import declarative_base
@@ -12,6 +13,7 @@ Base = declarative_base()
 class BaseModel:
     """A base class for all hbnb models"""
     
+    __clean = weakref.WeakSet()
     id = Column(String(60), nullable=False, primary_key=True)
     created_at = Column(DateTime, nullable=False, default=datetime.utcnow())
     updated_at = Column(DateTime, nullable=False, default=datetime.utcnow())
@@ -29,6 +31,34 @@ class BaseModel:
                 if key != "__class__":
                     setattr(self, key, value)
 
+    def __setattr__(self, name, value):
+        """Sets an attribute and flags the instance as dirty.
+
+        The ``_dirty`` flag tells the storage engine that the instance
+        changed since it was last written; the engine clears it once the
+        instance has been persisted.
+        """
+        super().__setattr__(name, value)
+        if name != '_dirty':
+            BaseModel.__clean.discard(self)
+
+    @property
+    def _dirty(self):
+        """True when the instance changed since the storage last wrote it.
+
+        The clean instances are kept in a class-level weak set rather than
+        in the instance ``__dict__``, which __str__ and to_dict() show.
+        """
+        return self not in BaseModel.__clean
+
+    @_dirty.setter
+    def _dirty(self, value):
+        """Flags the instance as dirty, or as clean."""
+        if value:
+            BaseModel.__clean.discard(self)
+        else:
+            BaseModel.__clean.add(self)
+
     def __str__(self):
         """Returns a string representation of the instance"""
         cls = (str(type(self)).split('.')[-1]).split('\'')[0]
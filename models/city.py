@@ -1,9 +1,10 @@
 #!/usr/bin/python3
 """ City Module for HBNB project """
+import models
 from models.base_model import BaseModel, Base
 from sqlalchemy import Column, String, ForeignKey
 from sqlalchemy.orm import relationship
-
+from os import getenv
 
 
 class City(BaseModel, Base):
@@ -19,4 +20,18 @@ class City(BaseModel, Base):
     __tablename__ = 'cities'
     name = Column(String(128), nullable=False)
     state_id = Column(String(60), ForeignKey("states.id"), nullable=False)
-    places = relationship('Place', backref='cities', cascade='all, delete-orphan')
+
+    if getenv("HBNB_TYPE_STORAGE") == "db":
+        places = relationship('Place', backref='cities',
+                              cascade='all, delete-orphan')
+    else:
+        @property
+        def places(self):
+            """Getter attribute that returns the list of Place instances
+               located in the current City.
+
+            Returns:
+                list: A list of Place instances linked to the current City.
+            """
+            return list(models.storage.related('Place', 'city_id',
+                                               self.id).values())
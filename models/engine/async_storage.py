@@ -0,0 +1,279 @@
+#!/usr/bin/python3
+"""Async Storage Module
+
+This module defines asynchronous counterparts of the storage engines for
+an asyncio or ASGI front end, where ``await storage.all(State)`` lets the
+event loop serve other requests while the storage works. The synchronous
+engines of ``models.storage`` are left as they are for the console.
+
+AsyncDBStorage runs on the asyncio extension of SQLAlchemy, which needs
+the greenlet package and an async driver: aiomysql for MySQL or aiosqlite
+for ``HBNB_DB_URL=sqlite:///...``. The URL is the one of DBStorage, with
+its driver replaced by the async one. Relationships cannot be loaded
+lazily in async code: the ones that are read must be named by a loading
+profile of the query.
+
+AsyncFileStorage runs the methods of FileStorage in an executor, one
+thread by default, so that reading and writing the file does not block
+the event loop, and so that new() does not change the objects while
+save() writes them.
+
+Queries are built as with the synchronous engines; their results are
+awaited, as in ``await storage.query(State).order_by('name').all()``.
+Every other method is awaited, new() included.
+
+Classes:
+    AsyncQuery: A query whose results are awaited.
+    AsyncDBStorage: Async storage over the database.
+    AsyncFileStorage: Async storage over FileStorage.
+
+Attributes:
+    drivers (dict): The async driver of each synchronous URL scheme.
+"""
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from os import getenv
+from sqlalchemy import event, func, select
+from models.engine.db_storage import (ensure_schema, mapped_class,
+                                      mapped_classes, sqlite_connect)
+from models.engine.file_storage import FileStorage
+from models.engine.query import DBQuery, FileQuery, Query
+
+drivers = {
+    'mysql': 'mysql+aiomysql', 'mysql+mysqldb': 'mysql+aiomysql',
+    'sqlite': 'sqlite+aiosqlite', 'sqlite+pysqlite': 'sqlite+aiosqlite'
+}
+
+
+class AsyncQuery(Query):
+    """A query whose results are awaited
+
+    The source is the async storage; each result method runs the
+    synchronous query of the storage holding the same criteria.
+    """
+
+    async def all(self):
+        """Returns the list of the objects matching the query."""
+        return await self._source.run_query(self, 'all')
+
+    async def first(self):
+        """Returns the first object matching the query, or None."""
+        return await self._source.run_query(self, 'first')
+
+    async def page(self, size, cursor=None, fields=('name', 'id')):
+        """Returns a page of the objects matching the query."""
+        return await self._source.run_query(self, 'page', size, cursor,
+                                            fields)
+
+    async def aggregate(self, by, fields=(), stats=('min', 'max', 'avg')):
+        """Returns statistics of fields for each value of a field."""
+        return await self._source.run_query(self, 'aggregate', by, fields,
+                                            stats)
+
+    def __iter__(self):
+        """Refuses synchronous iteration: use ``async for``."""
+        raise TypeError("Use 'async for' over an AsyncQuery")
+
+    async def __aiter__(self):
+        """Iterates over the objects matching the query."""
+        for obj in await self.all():
+            yield obj
+
+    def bind(self, query):
+        """Returns query holding the criteria of this query.
+
+        Args:
+            query (Query): A new synchronous query of the same class.
+        """
+        for name in ('_criteria', '_order', '_limit', '_offset', '_load',
+                     '_seek'):
+            setattr(query, name, getattr(self, name))
+        return query
+
+
+class AsyncDBStorage:
+    """Async storage over the database
+
+    Each asyncio task works in its own session, from an
+    async_scoped_session registry, which close() removes.
+
+    Attributes:
+        __engine (AsyncEngine): The async engine of the database.
+        __session (async_scoped_session): The session of the current task.
+    """
+    __engine = None
+    __session = None
+
+    def __init__(self):
+        """Creates the async engine of the database of DBStorage."""
+        from sqlalchemy.ext.asyncio import (async_scoped_session,
+                                            async_sessionmaker,
+                                            create_async_engine)
+
+        url = getenv('HBNB_DB_URL') or 'mysql+mysqldb://{}:{}@{}/{}'.format(
+            getenv('HBNB_MYSQL_USER'), getenv('HBNB_MYSQL_PWD'),
+            getenv('HBNB_MYSQL_HOST'), getenv('HBNB_MYSQL_DB'))
+        scheme, _, rest = url.partition(':')
+        url = drivers.get(scheme, scheme) + ':' + rest
+        if scheme.startswith('sqlite'):
+            self.__engine = create_async_engine(url)
+            event.listen(self.__engine.sync_engine, 'connect',
+                         sqlite_connect)
+        else:
+            self.__engine = create_async_engine(url, pool_pre_ping=True)
+        self.__session = async_scoped_session(
+            async_sessionmaker(self.__engine, expire_on_commit=False),
+            scopefunc=asyncio.current_task)
+
+    async def all(self, cls=None, load=()):
+        """Returns a dictionary of the objects of a class, or of all.
+
+        Args:
+            cls (class or str, optional): Class type, or its name.
+            load (tuple, optional): Names of loading profiles.
+
+        Returns:
+            dict: The objects by ``<class name>.<id>`` key.
+        """
+        objects = {}
+        for cls_obj in mapped_classes(cls):
+            for obj in await self.query(cls_obj).load(*load).all():
+                objects[type(obj).__name__ + '.' + obj.id] = obj
+        return objects
+
+    async def get(self, cls, id):
+        """Returns the object of a class with the given id, or None."""
+        cls = mapped_class(cls)
+        if cls is None:
+            return None
+        return await self.__session.get(cls, id)
+
+    async def count(self, cls=None):
+        """Returns the number of objects of a class, or of all."""
+        total = 0
+        for cls_obj in mapped_classes(cls):
+            total += await self.__session.scalar(
+                select(func.count()).select_from(cls_obj))
+        return total
+
+    def query(self, cls):
+        """Returns an AsyncQuery of the objects of a class.
+
+        Raises:
+            ValueError: If the class has no table, such as BaseModel.
+        """
+        cls_obj = mapped_class(cls)
+        if cls_obj is None:
+            raise ValueError("No table for class {!r}".format(
+                cls if type(cls) is str else cls.__name__))
+        return AsyncQuery(self, cls_obj)
+
+    async def run_query(self, query, method, *args):
+        """Runs a method of the DBQuery of an AsyncQuery.
+
+        Args:
+            query (AsyncQuery): The query.
+            method (str): The name of the method, such as ``all``.
+            *args: The arguments of the method.
+        """
+        def run(session):
+            """Runs the method in the synchronous session"""
+            return getattr(query.bind(DBQuery(session, query._cls)),
+                           method)(*args)
+        return await self.__session().run_sync(run)
+
+    async def new(self, obj):
+        """Adds an object to the session of the current task."""
+        self.__session.add(obj)
+
+    async def save(self):
+        """Commits the session of the current task."""
+        await self.__session.commit()
+
+    async def delete(self, obj=None):
+        """Deletes an object in the session of the current task."""
+        if obj is not None:
+            await self.__session.delete(obj)
+
+    async def reload(self):
+        """Creates the tables unless the schema fingerprint matches."""
+        async with self.__engine.connect() as conn:
+            await conn.run_sync(lambda sync: ensure_schema(sync.engine))
+
+    async def close(self):
+        """Closes and removes the session of the current task."""
+        await self.__session.remove()
+
+
+class AsyncFileStorage:
+    """Async storage over FileStorage
+
+    Attributes:
+        __storage (FileStorage): The synchronous storage.
+        __executor (Executor): The executor running its methods.
+    """
+
+    def __init__(self, storage=None, executor=None):
+        """Initializes the storage.
+
+        Args:
+            storage (FileStorage, optional): The synchronous storage;
+                a new FileStorage by default.
+            executor (Executor, optional): Runs the methods of the
+                storage; a single thread by default, as FileStorage is
+                not meant to run in several threads at once.
+        """
+        self.__storage = storage or FileStorage()
+        self.__executor = executor or ThreadPoolExecutor(max_workers=1)
+
+    async def all(self, cls=None):
+        """Returns a dictionary of the objects of a class, or of all."""
+        return dict(await self.__run(self.__storage.all, cls))
+
+    async def get(self, cls, id):
+        """Returns the object of a class with the given id, or None."""
+        return await self.__run(self.__storage.get, cls, id)
+
+    async def count(self, cls=None):
+        """Returns the number of objects of a class, or of all."""
+        return await self.__run(self.__storage.count, cls)
+
+    def query(self, cls):
+        """Returns an AsyncQuery of the objects of a class."""
+        return AsyncQuery(self, cls)
+
+    async def run_query(self, query, method, *args):
+        """Runs a method of the FileQuery of an AsyncQuery.
+
+        Args:
+            query (AsyncQuery): The query.
+            method (str): The name of the method, such as ``all``.
+            *args: The arguments of the method.
+        """
+        sync = query.bind(FileQuery(self.__storage, query._cls))
+        return await self.__run(getattr(sync, method), *args)
+
+    async def new(self, obj):
+        """Adds an object to the storage."""
+        await self.__run(self.__storage.new, obj)
+
+    async def save(self):
+        """Writes the storage file."""
+        await self.__run(self.__storage.save)
+
+    async def delete(self, obj=None):
+        """Deletes an object from the storage."""
+        await self.__run(self.__storage.delete, obj)
+
+    async def reload(self):
+        """Reads the storage file if it changed."""
+        await self.__run(self.__storage.reload)
+
+    async def close(self):
+        """Reads the storage file if another process changed it."""
+        await self.__run(self.__storage.close)
+
+    async def __run(self, function, *args):
+        """Runs a method of the storage in the executor."""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.__executor, function, *args)
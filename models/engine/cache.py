@@ -0,0 +1,134 @@
+#!/usr/bin/python3
+"""Cache Module
+
+This module defines the in-process cache of query results used by
+DBStorage when ``HBNB_DB_CACHE_SIZE`` is set.
+
+Classes:
+    QueryCache: Bounded LRU cache of query results with a time to live.
+"""
+import threading
+from collections import OrderedDict
+from time import monotonic
+
+
+class QueryCache:
+    """Bounded LRU cache of query results with a time to live
+
+    Each result is stored with the names of the classes it was read from,
+    so that a change to one of them invalidates it. Past max_size results,
+    the least recently used one is evicted; a result older than ttl seconds
+    is read again.
+
+    The queries run outside the lock. Each class has a generation, which
+    invalidate() increments, so that a result read while one of its
+    classes was invalidated is returned but not cached.
+
+    Attributes:
+        max_size (int): Maximum number of results kept.
+        ttl (float): Seconds a result is kept, or 0 to keep it until it
+            is evicted or invalidated.
+        hits (int): Number of lookups answered by the cache.
+        misses (int): Number of lookups that ran the query.
+        evictions (int): Number of results dropped to make room or
+            because they expired.
+        invalidations (int): Number of results dropped by invalidate().
+    """
+
+    def __init__(self, max_size=128, ttl=0):
+        """Initializes an empty cache.
+
+        Args:
+            max_size (int, optional): Maximum number of results kept.
+            ttl (float, optional): Seconds a result is kept, 0 for ever.
+        """
+        self.max_size = max_size
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+        self.__entries = OrderedDict()
+        self.__generations = {}
+        self.__cleared = 0
+        self.__lock = threading.Lock()
+
+    def get(self, key, classes, load):
+        """Returns the cached result of a query, running it on a miss.
+
+        Args:
+            key (tuple): The hashable description of the query.
+            classes (iterable): Names of the classes the result is read
+                from.
+            load (callable): Runs the query and returns its result list.
+
+        Returns:
+            list: A copy of the result.
+        """
+        classes = frozenset(classes)
+        with self.__lock:
+            entry = self.__entries.get(key)
+            if entry is not None:
+                if self.ttl and monotonic() - entry[0] > self.ttl:
+                    del self.__entries[key]
+                    self.evictions += 1
+                else:
+                    self.__entries.move_to_end(key)
+                    self.hits += 1
+                    return list(entry[2])
+            self.misses += 1
+            generation = self.__generation(classes)
+        result = load()
+        with self.__lock:
+            if self.__generation(classes) != generation:
+                return list(result)
+            self.__entries[key] = (monotonic(), classes, result)
+            self.__entries.move_to_end(key)
+            while len(self.__entries) > self.max_size:
+                self.__entries.popitem(last=False)
+                self.evictions += 1
+        return list(result)
+
+    def invalidate(self, *classes):
+        """Drops the results read from any of the classes.
+
+        Args:
+            *classes (str): The names of the changed classes.
+        """
+        classes = set(classes)
+        with self.__lock:
+            for name in classes:
+                self.__generations[name] = self.__generations.get(name, 0) + 1
+            for key, entry in list(self.__entries.items()):
+                if entry[1] & classes:
+                    del self.__entries[key]
+                    self.invalidations += 1
+
+    def clear(self):
+        """Drops every result."""
+        with self.__lock:
+            self.invalidations += len(self.__entries)
+            self.__entries.clear()
+            self.__cleared += 1
+
+    def __generation(self, classes):
+        """Returns the generations of the classes, under the lock.
+
+        Args:
+            classes (frozenset): Names of the classes.
+        """
+        return (self.__cleared,
+                tuple(self.__generations.get(name, 0) for name in classes))
+
+    def stats(self):
+        """Returns the counters of the cache.
+
+        Returns:
+            dict: The hits, misses, evictions and invalidations, and the
+            number of results cached.
+        """
+        with self.__lock:
+            return {'hits': self.hits, 'misses': self.misses,
+                    'evictions': self.evictions,
+                    'invalidations': self.invalidations,
+                    'size': len(self.__entries)}
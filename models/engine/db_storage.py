@@ -4,14 +4,46 @@
 This module defines the DBStorage class, responsible for interacting
 with the MySQL database using SQLAlchemy.
 
+``HBNB_DB_URL`` replaces the MySQL database with any SQLAlchemy URL, such
+as ``sqlite:///hbnb.db`` for an embedded database on a single node. An
+SQLite database runs in WAL mode, so that readers do not wait for the
+writer, with the synchronous, cache_size and mmap_size pragmas set on
+each connection from ``HBNB_SQLITE_SYNCHRONOUS`` (NORMAL),
+``HBNB_SQLITE_CACHE_SIZE`` (-65536, that is 64 MiB) and
+``HBNB_SQLITE_MMAP_SIZE`` (268435456 bytes).
+
+The tables are only created when the schema fingerprint, a hash of the
+DDL of the models stored in the ``hbnb_schema`` table, differs from the
+one of the models, so that a worker starting on an up-to-date database
+does not inspect every table.
+
+With ``HBNB_DB_CACHE_SIZE`` set, the results of up to that many queries
+are kept in a QueryCache for ``HBNB_DB_CACHE_TTL`` seconds (60 by
+default, 0 for no limit); new(), save() and delete() drop the results
+read from the classes they change. The cached objects are shared by every
+thread and should only be read; the relationships read from them must be
+fetched with a loading profile.
+
 Attributes:
     __engine (Engine): SQLAlchemy engine for database connection.
-    __session (Session): Current database session.
+    __session (scoped_session): Registry of the database sessions, one
+        per thread, used as the session of the current thread.
+    __cache (QueryCache): The cache of query results, or None.
+    classes (list): The model classes stored in the database.
+    schema (Table): The table holding the schema fingerprint.
 
 Classes:
     DBStorage: Handles database storage operations.
 
+Functions:
+    mapped_class: Returns the mapped class of a class name, or None.
+    mapped_classes: Returns the mapped classes to read for a class.
+    schema_fingerprint: Hashes the DDL of the models.
+    ensure_schema: Creates the tables unless the fingerprint matches.
+    sqlite_connect: Sets the pragmas of a new SQLite connection.
+
 """
+import hashlib
 from os import getenv
 from models.base_model import BaseModel, Base
 from models.city import City
@@ -20,12 +52,152 @@ from models.user import User
 from models.place import Place
 from models.review import Review
 from models.amenity import Amenity
-from sqlalchemy import create_engine
+from models.engine.cache import QueryCache
+from models.engine.query import DBQuery
+from sqlalchemy import (Column, String, Table, create_engine, event, func,
+                        select)
+from sqlalchemy.exc import DBAPIError
 from sqlalchemy.orm import sessionmaker, scoped_session
+from sqlalchemy.schema import CreateIndex, CreateTable
 
 
 classes = [State, City, User, Place, Review, Amenity]
 
+schema = Table('hbnb_schema', Base.metadata,
+               Column('fingerprint', String(64), primary_key=True))
+
+_fingerprints = {}
+
+
+def mapped_class(cls):
+    """Returns the mapped class of a class name, or of a class.
+
+    Args:
+        cls (class or str): Class type, or its name.
+
+    Returns:
+        class: The class, or None if it has no table, such as BaseModel
+        or an unknown name.
+    """
+    name = cls if type(cls) is str else cls.__name__
+    return {cls_obj.__name__: cls_obj for cls_obj in classes}.get(name)
+
+
+def mapped_classes(cls=None):
+    """Returns the mapped classes to read for a class, or all of them.
+
+    Args:
+        cls (class or str, optional): Class type, or its name.
+
+    Returns:
+        list: The class, none if it has no table, or every mapped class.
+    """
+    if not cls:
+        return classes
+    cls = mapped_class(cls)
+    return [] if cls is None else [cls]
+
+
+def schema_fingerprint(dialect):
+    """Hash the DDL of the tables of the models.
+
+    The hash is computed once per dialect and process.
+
+    Args:
+        dialect (Dialect): The SQL dialect the DDL is compiled to.
+
+    Returns:
+        str: The SHA-256 hex digest of the CREATE statements.
+    """
+    key = (dialect.name, dialect.driver)
+    if key not in _fingerprints:
+        _fingerprints[key] = _fingerprint(dialect)
+    return _fingerprints[key]
+
+
+def _fingerprint(dialect):
+    """Hash the DDL of the tables of the models for a dialect."""
+    digest = hashlib.sha256()
+    for table in Base.metadata.sorted_tables:
+        digest.update(str(CreateTable(table).compile(dialect=dialect))
+                      .encode('utf-8'))
+        for index in sorted(table.indexes, key=lambda index: str(index.name)):
+            digest.update(str(CreateIndex(index).compile(dialect=dialect))
+                          .encode('utf-8'))
+    return digest.hexdigest()
+
+
+def sqlite_connect(dbapi_connection, connection_record):
+    """Set the journal mode and pragmas of a new SQLite connection.
+
+    Args:
+        dbapi_connection: The sqlite3 connection.
+        connection_record: The pool record of the connection.
+    """
+    cursor = dbapi_connection.cursor()
+    cursor.execute('PRAGMA journal_mode=WAL')
+    cursor.execute('PRAGMA synchronous={}'.format(
+        getenv('HBNB_SQLITE_SYNCHRONOUS', 'NORMAL')))
+    cursor.execute('PRAGMA cache_size={:d}'.format(
+        int(getenv('HBNB_SQLITE_CACHE_SIZE', -65536))))
+    cursor.execute('PRAGMA mmap_size={:d}'.format(
+        int(getenv('HBNB_SQLITE_MMAP_SIZE', 268435456))))
+    cursor.close()
+
+
+def ensure_schema(engine):
+    """Create the tables of the models unless the schema is up to date.
+
+    The stored fingerprint is read with a single SELECT; create_all, which
+    inspects every table, only runs when it is missing or differs, along
+    with the indexes added to existing tables, and the new fingerprint is
+    then stored.
+
+    Workers starting together may all find the fingerprint missing: the
+    other fingerprints are deleted and this one only inserted if no worker
+    stored it first, and a worker losing a race on a table, an index, the
+    insert or a lock runs both steps again, which then find the work done.
+
+    Args:
+        engine (Engine): The engine of the database.
+
+    Returns:
+        bool: True if the tables were checked and created.
+    """
+    fingerprint = schema_fingerprint(engine.dialect)
+    try:
+        with engine.connect() as conn:
+            stored = conn.execute(select(schema.c.fingerprint)).scalar()
+    except DBAPIError:
+        # No fingerprint table yet.
+        stored = None
+    if stored == fingerprint:
+        return False
+    # Each lost race means another worker created a table or an index or
+    # stored the fingerprint, so one attempt per table and index and one
+    # more always suffice.
+    attempts = sum(1 + len(table.indexes)
+                   for table in Base.metadata.tables.values()) + 1
+    for attempt in range(attempts):
+        try:
+            Base.metadata.create_all(engine)
+            # create_all only creates the indexes of the tables it creates.
+            for table in Base.metadata.sorted_tables:
+                for index in table.indexes:
+                    index.create(engine, checkfirst=True)
+            with engine.begin() as conn:
+                conn.execute(schema.delete().where(
+                    schema.c.fingerprint != fingerprint))
+                if conn.execute(select(schema.c.fingerprint)).first() is None:
+                    conn.execute(schema.insert().values(
+                        fingerprint=fingerprint))
+            return True
+        except DBAPIError:
+            # Another worker created a table or an index or stored the
+            # fingerprint first, or held a lock this one waited on.
+            if attempt == attempts - 1:
+                raise
+
 
 class DBStorage:
     """DBStorage class
@@ -36,7 +208,14 @@ class DBStorage:
     Methods:
         __init__: Initializes the DBStorage instance.
         all: Retrieves objects from the database.
+        iter: Streams objects in batches.
+        get: Retrieves one object by primary key.
+        count: Counts objects with SELECT COUNT(*).
+        query: Builds a query compiled to SQL.
+        cache_stats: Returns the counters of the query cache.
+        version: Returns the number of changes made through the storage.
         new: Adds a new object to the database session.
+        new_many: Inserts many objects in batches with one commit.
         save: Commits changes to the database session.
         delete: Deletes an object from the database session.
         reload: Reloads the database session.
@@ -44,15 +223,18 @@ class DBStorage:
     """
     __engine = None
     __session = None
+    __cache = None
+    __version = 0
 
     def __init__(self):
         """Initialize DBStorage.
 
-        Connects to the MySQL database based on environment variables.
+        Connects to the MySQL database based on environment variables,
+        or to the database of HBNB_DB_URL.
         Drops tables if in 'test' environment.
         """
         # Define the database connection URI
-        connection_url = (
+        connection_url = getenv('HBNB_DB_URL') or (
             'mysql+mysqldb://{}:{}@{}/{}'
             .format(
                 getenv('HBNB_MYSQL_USER'),
@@ -62,35 +244,127 @@ class DBStorage:
             )
 
         # Create an SQLAlchemy engine
-        self.__engine = create_engine(connection_url, pool_pre_ping=True)
+        if connection_url.startswith('sqlite'):
+            # SQLite picks its own pool, which the pool options may not fit.
+            self.__engine = create_engine(connection_url)
+            event.listen(self.__engine, 'connect', sqlite_connect)
+        else:
+            self.__engine = create_engine(connection_url,
+                                          **self.__pool_options())
 
         if getenv('HBNB_ENV') == 'test':
             # Drop all tables in the database if in 'test' environment
             Base.metadata.drop_all(self.__engine)
 
-    def all(self, cls=None):
+        if int(getenv('HBNB_DB_CACHE_SIZE', 0)):
+            self.__cache = QueryCache(int(getenv('HBNB_DB_CACHE_SIZE')),
+                                      float(getenv('HBNB_DB_CACHE_TTL', 60)))
+
+    def all(self, cls=None, load=()):
         """Get all objects or specific class objects from the database.
 
         Args:
-            cls (class, optional): Class type. Defaults to None.
+            cls (class or str, optional): Class type, or its name.
+                Defaults to None.
+            load (tuple, optional): Names of the loading profiles of
+                models.engine.query whose relationships are fetched with
+                the objects, such as ``('cities',)``.
 
         Returns:
             dict: Dictionary of objects.
         """
         all_objs = {}
-        if cls:
-            query_objs = self.__session.query(cls).all()
+        for cls_obj in mapped_classes(cls):
+            query_objs = self.query(cls_obj).load(*load).all()
             for obj in query_objs:
                 key = '{}.{}'.format(type(obj).__name__, obj.id)
                 all_objs[key] = obj
-        else:
-            for cls_obj in classes:
-                query_objs = self.__session.query(cls_obj).all()
-                for obj in query_objs:
-                    key = '{}.{}'.format(type(obj).__name__, obj.id)
-                    all_objs[key] = obj
         return all_objs
 
+    def iter(self, cls=None, batch_size=1000):
+        """Stream objects from the database, batch_size rows at a time.
+
+        The rows are fetched through a server-side cursor with yield_per,
+        so that the classes are read one after the other without loading a
+        whole table in memory.
+
+        Args:
+            cls (class or str, optional): Class type, or its name.
+                Defaults to None, which streams every class.
+            batch_size (int, optional): Number of rows fetched at a time.
+
+        Yields:
+            BaseModel: The objects.
+        """
+        for cls_obj in mapped_classes(cls):
+            query = self.__session.query(cls_obj).execution_options(
+                stream_results=True)
+            for obj in query.yield_per(batch_size):
+                yield obj
+
+    def get(self, cls, id):
+        """Get one object by primary key.
+
+        The session's identity map is checked before the database.
+
+        Args:
+            cls (class or str): Class type, or its name.
+            id (str): The id of the object.
+
+        Returns:
+            BaseModel: The object, or None if there is none, or if the
+            class has no table, such as BaseModel.
+        """
+        cls = mapped_class(cls)
+        if cls is None:
+            return None
+        return self.__session.get(cls, id)
+
+    def count(self, cls=None):
+        """Count objects with SELECT COUNT(*), without loading them.
+
+        Args:
+            cls (class or str, optional): Class type, or its name.
+                Defaults to None, which counts the objects of every class.
+
+        Returns:
+            int: The number of objects.
+        """
+        total = 0
+        for cls_obj in mapped_classes(cls):
+            total += self.__session.query(func.count()).select_from(
+                cls_obj).scalar()
+        return total
+
+    def query(self, cls):
+        """Build a query of the objects of a class.
+
+        The criteria of the query are compiled to SQL WHERE, ORDER BY,
+        LIMIT and OFFSET clauses.
+
+        Args:
+            cls (class or str): Class type, or its name.
+
+        Returns:
+            DBQuery: The query; see models.engine.query.
+
+        Raises:
+            ValueError: If the class has no table, such as BaseModel.
+        """
+        return DBQuery(self.__session, self.__mapped(cls), self.__cache)
+
+    def cache_stats(self):
+        """Return the counters of the query cache.
+
+        Returns:
+            dict: The hits, misses, evictions and invalidations of the
+            cache and the number of results it holds, or None when the
+            cache is off.
+        """
+        if self.__cache is None:
+            return None
+        return self.__cache.stats()
+
     def new(self, obj):
         """Add a new object to the current database session.
 
@@ -98,10 +372,56 @@ class DBStorage:
             obj (BaseModel): Object to be added.
         """
         self.__session.add(obj)
+        self.__invalidate([obj])
+        self.__version += 1
+
+    def new_many(self, objs, batch_size=1000):
+        """Insert many objects in batches, then commit once.
+
+        The objects are added and flushed batch_size at a time; the ORM
+        sends the rows of each class of a batch as one executemany INSERT.
+        The objects built from dictionaries are removed from the session
+        once flushed, so that its identity map does not grow with them.
+        If a flush or the commit fails, the session is rolled back, so
+        that no object is inserted and the session stays usable.
+
+        Args:
+            objs (iterable): The objects, or dictionaries as returned by
+                to_dict(), which hold the name of their class.
+            batch_size (int, optional): Number of objects per flush.
+
+        Returns:
+            int: The number of objects inserted.
+        """
+        count = 0
+        batch = []
+        built = []
+        names = set()
+        try:
+            for obj in objs:
+                if type(obj) is dict:
+                    obj = self.__mapped(obj['__class__'])(**obj)
+                    built.append(obj)
+                batch.append(obj)
+                names.add(type(obj))
+                if len(batch) >= batch_size:
+                    count += self.__flush(batch, built)
+            count += self.__flush(batch, built)
+            self.__session.commit()
+        except Exception:
+            self.__session.rollback()
+            raise
+        self.__invalidate(names)
+        self.__version += 1
+        return count
 
     def save(self):
         """Commit changes to the current database session."""
+        changed = (list(self.__session.new) + list(self.__session.dirty) +
+                   list(self.__session.deleted))
         self.__session.commit()
+        self.__invalidate(changed)
+        self.__version += 1
 
     def delete(self, obj=None):
         """Delete an object from the current database session.
@@ -111,31 +431,115 @@ class DBStorage:
         """
         if obj:
             self.__session.delete(obj)
+            self.__invalidate([obj])
+            self.__version += 1
+
+    def version(self):
+        """Return the number of changes made through the storage.
+
+        The number grows with every new(), new_many(), save() and
+        delete() of this process, so that a cache of data read from the
+        storage can tell it is stale; changes made by other processes are
+        not counted.
+        """
+        return self.__version
 
     def reload(self):
         """Reload the database session.
 
-        Create all tables in the database.
-        Set up the current database session using sessionmaker and
-        scoped_session.
+        Create all tables in the database, unless the schema fingerprint
+        says they are up to date.
+        Set up the session registry using sessionmaker and
+        scoped_session. Each thread, and so each request of a threaded
+        WSGI server, gets its own session from the registry the first
+        time it uses the storage.
         """
         # Create all tables in the database.
-        Base.metadata.create_all(self.__engine)
+        ensure_schema(self.__engine)
 
         # Set up the current database session
         # Create a session factory using sessionmaker.
         Session = sessionmaker(bind=self.__engine, expire_on_commit=False)
 
-        # Wrap the session factory with scoped_session.
-        Scope_session = scoped_session(Session)
+        # Drop the sessions of a previous registry.
+        if self.__session is not None:
+            self.__session.remove()
 
-        # Create a session.
-        self.__session = Scope_session()
+        # Wrap the session factory with scoped_session. The registry
+        # proxies add, commit, query... to the session of the calling
+        # thread.
+        self.__session = scoped_session(Session)
 
     def close(self):
         """Close the current database session.
 
-        Calls the close method on the current session to properly
-        close any open connections.
-        """""
-        self.__session.close()
+        Closes the session of the calling thread and removes it from the
+        registry, returning its connection to the pool; the next use of
+        the storage in this thread starts a new session.
+        """
+        self.__session.remove()
+
+    def __invalidate(self, objs):
+        """Drop the cached results read from the classes of objects.
+
+        Args:
+            objs (iterable): The changed objects, or their classes.
+        """
+        if self.__cache is not None:
+            self.__cache.invalidate(*set(
+                (obj if type(obj) is type else type(obj)).__name__
+                for obj in objs))
+
+    def __flush(self, batch, built):
+        """Flush a batch of new objects and empty it.
+
+        Args:
+            batch (list): The objects to insert.
+            built (list): The objects of the batch built from dictionaries,
+                removed from the session once flushed.
+
+        Returns:
+            int: The number of objects flushed.
+        """
+        count = len(batch)
+        self.__session.add_all(batch)
+        self.__session.flush()
+        for obj in built:
+            self.__session.expunge(obj)
+        batch.clear()
+        built.clear()
+        return count
+
+    def __pool_options(self):
+        """Return the connection pool options of the engine.
+
+        The options are read from HBNB_DB_POOL_SIZE, HBNB_DB_MAX_OVERFLOW,
+        HBNB_DB_POOL_RECYCLE (seconds), HBNB_DB_POOL_PRE_PING (on unless
+        set to 0) and HBNB_DB_POOL_LIFO; unset ones keep the SQLAlchemy
+        defaults.
+        """
+        options = {'pool_pre_ping': getenv('HBNB_DB_POOL_PRE_PING', '1')
+                   in ('1', 'true', 'yes')}
+        for name, variable in (('pool_size', 'HBNB_DB_POOL_SIZE'),
+                               ('max_overflow', 'HBNB_DB_MAX_OVERFLOW'),
+                               ('pool_recycle', 'HBNB_DB_POOL_RECYCLE')):
+            if getenv(variable):
+                options[name] = int(getenv(variable))
+        if getenv('HBNB_DB_POOL_LIFO', '') in ('1', 'true', 'yes'):
+            options['pool_use_lifo'] = True
+        return options
+
+    def __mapped(self, cls):
+        """Return the mapped class of a class name, or of a class.
+
+        Args:
+            cls (class or str): Class type, or its name.
+
+        Raises:
+            ValueError: If the class has no table, such as BaseModel.
+        """
+        cls_obj = mapped_class(cls)
+        if cls_obj is None:
+            raise ValueError("No table for class {!r}".format(
+                cls if type(cls) is str else cls.__name__))
+        return cls_obj
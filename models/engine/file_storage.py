@@ -1,75 +1,833 @@
 #!/usr/bin/python3
 """This module defines a class to manage file storage for hbnb clone"""
+import atexit
+import hashlib
 import json
+import os
+import threading
+from models.engine.codec import codecs
+from models.engine.query import FileQuery
+from os import getenv
+
+
+def split_file(path, directory, codec='json'):
+    """Splits a storage file into one shard file per class.
+
+    The records are read from path into ``<directory>/<class>.json`` (or
+    the extension of the codec), the layout FileStorage uses when
+    ``HBNB_FILE_STORAGE_DIR`` is set. A journal next to path is not read,
+    so the store should be saved with journal mode off first.
+
+    Args:
+        path (str): The storage file to split.
+        directory (str): The directory receiving the shards.
+        codec (str, optional): Name of the format of the files.
+
+    Returns:
+        list: The names of the classes written.
+    """
+    codec = codecs[codec]
+    mode = 'b' if codec.binary else ''
+    os.makedirs(directory, exist_ok=True)
+    shards = {}
+    with open(path, 'r' + mode) as f:
+        for key, raw in codec.iter_items(f, raw=True):
+            shards.setdefault(key.split('.')[0], []).append(
+                codec.member(key, raw))
+    for name, members in shards.items():
+        shard = os.path.join(directory, name + codec.extension)
+        with open(shard + '.tmp', 'w' + mode) as f:
+            codec.write(f, members)
+        os.replace(shard + '.tmp', shard)
+    return sorted(shards)
 
 
 class FileStorage:
-    """This class manages storage of hbnb models in JSON format"""
+    """This class manages storage of hbnb models in JSON format
+
+    Besides the flat ``__objects`` dictionary, the storage keeps
+    ``__by_class``, a secondary index mapping each class name to the
+    ``{key: obj}`` dictionary of its instances, so that ``all(cls)`` only
+    touches the objects of the requested class.
+
+    ``__refs`` indexes the objects of each class by the value of their
+    foreign keys (``state_id``, ``city_id``, ``place_id`` and ``user_id``),
+    so that related() answers ``State.cities`` and the other relationships
+    of file mode without scanning the class. An object is indexed when it
+    is stored by new(), save() or reload(); ``__ref_keys`` remembers the
+    values it was indexed under so that it moves when they change.
+
+    In journal mode (``HBNB_FILE_JOURNAL=1``) save() appends one JSON line
+    per object added, changed or deleted since the previous save to
+    ``<file>.journal`` instead of rewriting the whole file; reload()
+    replays that journal on top of the snapshot, and the snapshot is
+    rewritten once the journal grows past ``HBNB_FILE_JOURNAL_SIZE`` bytes.
+
+    ``__encoded`` caches the encoding of every object as last written, so
+    that a save only encodes the objects whose ``_dirty`` flag is set. The
+    models built by reload() start clean; they are encoded by the first
+    save, which does not hold the text of the file in memory meanwhile.
+
+    The format of the file is picked by ``HBNB_FILE_FORMAT``: ``json`` (the
+    default, and the fastest) or ``binary``, which is written to
+    ``file.bin``, about 4 times smaller but slower to encode and decode;
+    see models.engine.codec. The journal is always made of JSON lines.
+
+    In write-behind mode (``HBNB_FILE_FLUSH_INTERVAL`` seconds) save() only
+    counts the change; a background timer writes the file at most once per
+    interval, or right away after ``HBNB_FILE_FLUSH_PENDING`` saves, and
+    flush() runs again when the interpreter exits.
+
+    In lazy mode (``HBNB_FILE_LAZY=1``) reload() keeps the encoding of the
+    records it reads in ``__raw``, by class name, and a model is only built
+    the first time its class is requested through all(); the model then
+    stays in ``__objects``.
+
+    With ``HBNB_FILE_STORAGE_DIR`` set, the store is sharded into one
+    ``<class>.json`` (or ``.bin``) file per class in that directory instead of
+    ``file.json``. save() only rewrites the shards of classes with changed
+    objects, and a shard is only read once its class is requested.
+
+    ``__stamps`` records, for each file read or written, its inode,
+    modification time and size along with a fingerprint of its content.
+    reload() skips the files whose stamp has not changed, so that close(),
+    which runs after every request of the web apps, only parses the
+    storage again when another process wrote it.
+
+    ``__version`` counts the changes to the storage: new(), save(),
+    delete() and the files read by reload(). version() returns it to the
+    caches of data read from the storage.
+    """
     __file_path = 'file.json'
     __objects = {}
+    __by_class = {}
+    __refs = {}
+    __ref_keys = {}
+    __ref_names = ('state_id', 'city_id', 'place_id', 'user_id')
+    __pending = {}
+    __encoded = {}
+    __encoded_by = None
+    __raw = {}
+    __shards = {}
+    __stamps = {}
+    __models = None
+    __lock = threading.RLock()
+    __unsaved = 0
+    __timer = None
+    __version = 0
+
+    def __init__(self, journal=None, journal_size=None, flush_interval=None,
+                 flush_pending=None, lazy=None, shard_dir=None, codec=None):
+        """Initializes the storage options.
+
+        Args:
+            journal (bool, optional): Append changes to a journal file on
+                save. Defaults to the HBNB_FILE_JOURNAL environment variable.
+            journal_size (int, optional): Journal size in bytes past which
+                save() compacts it into the snapshot. Defaults to the
+                HBNB_FILE_JOURNAL_SIZE environment variable, or 1 MiB.
+            flush_interval (float, optional): Delay in seconds between a
+                save and the write of the file; 0 writes on every save.
+                Defaults to the HBNB_FILE_FLUSH_INTERVAL environment
+                variable, or 0.
+            flush_pending (int, optional): Number of saves after which the
+                file is written without waiting for the interval. Defaults
+                to the HBNB_FILE_FLUSH_PENDING environment variable, or 100.
+            lazy (bool, optional): Keep reloaded records undecoded until
+                their class is requested. Defaults to the HBNB_FILE_LAZY
+                environment variable.
+            shard_dir (str, optional): Directory of the per-class shard
+                files; the single storage file is used when empty. Defaults
+                to the HBNB_FILE_STORAGE_DIR environment variable.
+            codec (str, optional): Name of the file format, ``json`` or
+                ``binary``. Defaults to the HBNB_FILE_FORMAT environment
+                variable, or ``json``.
+        """
+        if journal is None:
+            journal = getenv('HBNB_FILE_JOURNAL', '') in ('1', 'true', 'yes')
+        if journal_size is None:
+            journal_size = int(getenv('HBNB_FILE_JOURNAL_SIZE', 1 << 20))
+        if flush_interval is None:
+            flush_interval = float(getenv('HBNB_FILE_FLUSH_INTERVAL', 0))
+        if flush_pending is None:
+            flush_pending = int(getenv('HBNB_FILE_FLUSH_PENDING', 100))
+        if lazy is None:
+            lazy = getenv('HBNB_FILE_LAZY', '') in ('1', 'true', 'yes')
+        if shard_dir is None:
+            shard_dir = getenv('HBNB_FILE_STORAGE_DIR', '')
+        if codec is None:
+            codec = getenv('HBNB_FILE_FORMAT') or 'json'
+        self.__journal = journal
+        self.__journal_size = journal_size
+        self.__flush_interval = flush_interval
+        self.__flush_pending = flush_pending
+        self.__lazy = lazy
+        self.__shard_dir = shard_dir
+        self.__codec = codecs[codec]
+        self.__path = (os.path.splitext(FileStorage.__file_path)[0] +
+                       self.__codec.extension)
+        if flush_interval:
+            atexit.register(self.flush)
 
     def all(self, cls=None):
-        """Returns a dictionary of models currently in storage"""
-        my_dict = {}
+        """Returns a dictionary of models currently in storage
+
+        Args:
+            cls (class or str, optional): Only return objects of this class.
+                The class name may be given instead of the class itself.
+
+        Returns:
+            dict: ``__objects`` itself when cls is None, otherwise a new
+            dictionary holding the objects of that class.
+        """
+        if cls:
+            name = cls if type(cls) is str else cls.__name__
+            self.__load_class(name)
+            return dict(FileStorage.__by_class.get(name, {}))
+        for name in list(FileStorage.__shards):
+            self.__load_shard(name, self.__lazy)
+        for name in list(FileStorage.__raw):
+            self.__hydrate(name)
+        return FileStorage.__objects
+
+    def iter(self, cls=None, batch_size=1000):
+        """Yields the models in storage one by one.
+
+        The objects already built are yielded from the index without
+        copying it. Records not decoded yet, in lazy mode or in shards not
+        read yet, are decoded as they are yielded and are not kept, so a
+        pass over the whole store holds one of them at a time. The storage
+        must not change while the iteration runs.
+
+        Args:
+            cls (class or str, optional): Only yield objects of this class.
+                The class name may be given instead of the class itself.
+            batch_size (int, optional): Accepted for compatibility with
+                DBStorage; records are decoded one at a time.
+
+        Yields:
+            BaseModel: The objects, in no particular order.
+        """
         if cls:
-            for key, value in self.__objects.items():
-                if type(value) == cls:
-                    my_dict[key] = value
+            names = [cls if type(cls) is str else cls.__name__]
+            for obj in FileStorage.__by_class.get(names[0], {}).values():
+                yield obj
         else:
-            my_dict = FileStorage.__objects
-        return my_dict
+            names = list(FileStorage.__raw) + list(FileStorage.__shards)
+            for obj in FileStorage.__objects.values():
+                yield obj
+        for name in names:
+            for key, val in FileStorage.__raw.get(name, {}).items():
+                val = self.__codec.decode(val)
+                yield self.__classes()[val['__class__']](**val)
+            path = FileStorage.__shards.get(name)
+            if path is None:
+                continue
+            try:
+                f = open(path, 'rb' if self.__codec.binary else 'r')
+            except FileNotFoundError:
+                continue
+            with f:
+                for key, val in self.__codec.iter_items(f):
+                    # Objects created since the reload take precedence.
+                    if key not in FileStorage.__objects:
+                        yield self.__classes()[val['__class__']](**val)
+
+    def get(self, cls, id):
+        """Returns the object of a class with the given id.
+
+        In lazy mode only the record of that object is decoded.
+
+        Args:
+            cls (class or str): The class of the object, or its name.
+            id (str): The id of the object.
+
+        Returns:
+            BaseModel: The object, or None if there is none.
+        """
+        name = cls if type(cls) is str else cls.__name__
+        key = '{}.{}'.format(name, id)
+        if name in FileStorage.__shards:
+            self.__load_shard(name, self.__lazy)
+        raw = FileStorage.__raw.get(name)
+        if raw and key in raw:
+            self.__load(key, self.__codec.decode(raw[key]))
+        return FileStorage.__by_class.get(name, {}).get(key)
+
+    def count(self, cls=None):
+        """Returns the number of objects in storage.
+
+        Records not decoded yet are counted without building their models.
+
+        Args:
+            cls (class or str, optional): Only count objects of this class.
+                The class name may be given instead of the class itself.
+
+        Returns:
+            int: The number of objects.
+        """
+        if cls:
+            name = cls if type(cls) is str else cls.__name__
+            if name in FileStorage.__shards:
+                self.__load_shard(name, True)
+            return (len(FileStorage.__by_class.get(name, {})) +
+                    len(FileStorage.__raw.get(name, {})))
+        for name in list(FileStorage.__shards):
+            self.__load_shard(name, True)
+        return len(FileStorage.__objects) + sum(
+            len(raw) for raw in FileStorage.__raw.values())
+
+    def query(self, cls):
+        """Returns a query of the objects of a class.
+
+        Args:
+            cls (class or str): The class queried, or its name.
+
+        Returns:
+            FileQuery: The query, to refine with filter(), order_by(),
+            limit() and offset(); see models.engine.query.
+        """
+        return FileQuery(self, cls)
+
+    def related(self, cls, name, value):
+        """Returns the objects of a class whose foreign key has a value.
+
+        Args:
+            cls (class or str): The class of the objects, or its name.
+            name (str): The foreign key, such as ``state_id``.
+            value (str): The id the foreign key must hold.
+
+        Returns:
+            dict: The matching objects by key.
+        """
+        cls = cls if type(cls) is str else cls.__name__
+        self.__load_class(cls)
+        if name not in FileStorage.__ref_names:
+            return {key: obj for key, obj in
+                    FileStorage.__by_class.get(cls, {}).items()
+                    if obj.__dict__.get(name) == value}
+        refs = FileStorage.__refs.get(cls, {}).get(name, {}).get(value, {})
+        # Objects changed without being stored again may be indexed under
+        # their previous value.
+        return {key: obj for key, obj in refs.items()
+                if obj.__dict__.get(name) == value and
+                FileStorage.__objects.get(key) is obj}
 
     def new(self, obj):
         """Adds new object to storage dictionary"""
-        self.all().update({obj.to_dict()['__class__'] + '.' + obj.id: obj})
+        key = type(obj).__name__ + '.' + obj.id
+        self.__add(key, obj)
+        FileStorage.__pending[key] = obj
+        FileStorage.__version += 1
+
+    def new_many(self, objs, batch_size=1000):
+        """Adds many objects to storage and saves them at once
+
+        The file is written once, after the last object, instead of once
+        per object as with BaseModel.save().
+
+        Args:
+            objs (iterable): The objects, or dictionaries as returned by
+                to_dict(), which hold the name of their class.
+            batch_size (int, optional): Accepted for compatibility with
+                DBStorage; the objects are written together.
+
+        Returns:
+            int: The number of objects added.
+        """
+        count = 0
+        with FileStorage.__lock:
+            for obj in objs:
+                if type(obj) is dict:
+                    obj = self.__classes()[obj['__class__']](**obj)
+                self.new(obj)
+                count += 1
+        self.save()
+        return count
 
     def save(self):
-        """Saves storage dictionary to file"""
-        with open(FileStorage.__file_path, 'w') as f:
-            temp = {}
-            temp.update(FileStorage.__objects)
-            for key, val in temp.items():
-                temp[key] = val.to_dict()
-            json.dump(temp, f)
-
-    def reload(self):
-        """Loads storage dictionary from file"""
-        from models.base_model import BaseModel
-        from models.user import User
-        from models.place import Place
-        from models.state import State
-        from models.city import City
-        from models.amenity import Amenity
-        from models.review import Review
-
-        classes = {
-                    'BaseModel': BaseModel, 'User': User, 'Place': Place,
-                    'State': State, 'City': City, 'Amenity': Amenity,
-                    'Review': Review
-                  }
-        try:
-            temp = {}
-            with open(FileStorage.__file_path, 'r') as f:
-                temp = json.load(f)
-                for key, val in temp.items():
-                    self.all()[key] = classes[val['__class__']](**val)
-        except FileNotFoundError:
-            pass
+        """Saves storage dictionary to file
+
+        In write-behind mode the file is only written by flush(), which
+        this schedules.
+        """
+        FileStorage.__version += 1
+        if not self.__flush_interval:
+            with FileStorage.__lock:
+                self.__write()
+            return
+        with FileStorage.__lock:
+            FileStorage.__unsaved += 1
+            if FileStorage.__unsaved < self.__flush_pending:
+                if FileStorage.__timer is None:
+                    FileStorage.__timer = threading.Timer(
+                        self.__flush_interval, self.flush)
+                    FileStorage.__timer.daemon = True
+                    FileStorage.__timer.start()
+                return
+        self.flush()
+
+    def flush(self):
+        """Writes the saves that write-behind mode has not written yet"""
+        with FileStorage.__lock:
+            if FileStorage.__timer is not None:
+                FileStorage.__timer.cancel()
+                FileStorage.__timer = None
+            if not FileStorage.__unsaved:
+                return
+            FileStorage.__unsaved = 0
+            self.__write()
+
+    def reload(self, force=False):
+        """Loads storage dictionary from file
+
+        The file is parsed incrementally and each record turned into a
+        model right away, so the decoded file is never held in memory as a
+        whole. In lazy mode the records are kept as they are read. Saves
+        still waiting in write-behind mode are flushed first.
+
+        Files that did not change since this process last read or wrote
+        them are not parsed again, unless force is set.
+
+        With shards, only the shards of classes already in storage are read
+        now; the others are read when their class is requested.
+
+        Args:
+            force (bool, optional): Read the files even if they did not
+                change.
+        """
+        self.flush()
+        if self.__shard_dir:
+            self.__reload_shards(force)
+            return
+        stamp = self.__changed(self.__path, force)
+        if stamp:
+            self.__read(self.__path, self.__lazy)
+            FileStorage.__stamps[self.__path] = stamp
+        journal = self.__path + '.journal'
+        # A new snapshot may hold older versions of the journaled objects.
+        stamp = self.__changed(journal, force or stamp is not None)
+        if not stamp:
+            return
+        with open(journal, 'r') as f:
+            for line in f:
+                try:
+                    key, val = json.loads(line)
+                except ValueError:
+                    # Record torn by a crash in the middle of a save.
+                    continue
+                if val is None:
+                    self.__remove(key)
+                else:
+                    self.__load(key, val)
+        FileStorage.__stamps[journal] = stamp
+        FileStorage.__version += 1
 
     def delete(self, obj=None):
         """Delete an object from the storage.
 
-        This method removes the specified object from the storage dictionary.
+        This method removes the specified object from the storage dictionary
+        and from the per-class index.
 
         Args:
         obj (object, optional): The object to be deleted. Defaults to None.
         """
         try:
-            del self.__objects["{}.{}".format(obj.__class__.__name__, obj.id)]
-        except (AttributeError, KeyError):
-            pass
+            key = "{}.{}".format(obj.__class__.__name__, obj.id)
+        except AttributeError:
+            return
+        if self.__remove(key):
+            FileStorage.__pending[key] = None
+            FileStorage.__version += 1
+
+    def version(self):
+        """Returns the number of changes made to the storage
+
+        The number grows with every new(), save() and delete(), and when
+        reload() reads a file written by another process, so that a cache
+        of data read from the storage can tell it is stale.
+        """
+        return FileStorage.__version
 
     def close(self):
         """Calls the reload method for deserializing the JSON file to objects.
+
+        The file is only parsed again if it changed since it was last read
+        or written.
         """
         self.reload()
+
+    def __classes(self):
+        """Returns the model classes by name"""
+        if FileStorage.__models is None:
+            from models.base_model import BaseModel
+            from models.user import User
+            from models.place import Place
+            from models.state import State
+            from models.city import City
+            from models.amenity import Amenity
+            from models.review import Review
+
+            FileStorage.__models = {
+                'BaseModel': BaseModel, 'User': User, 'Place': Place,
+                'State': State, 'City': City, 'Amenity': Amenity,
+                'Review': Review
+            }
+        return FileStorage.__models
+
+    def __read(self, path, raw, keep=False):
+        """Loads the records of a storage file.
+
+        Args:
+            path (str): Path of the storage file or shard.
+            raw (bool): Keep the JSON text of the records instead of
+                building their models.
+            keep (bool, optional): Leave the objects already in storage
+                untouched instead of replacing them.
+        """
+        with open(path, 'rb' if self.__codec.binary else 'r') as f:
+            for key, val in self.__codec.iter_items(f, raw=raw):
+                if keep and key in FileStorage.__objects:
+                    continue
+                if raw:
+                    self.__load_raw(key, val)
+                else:
+                    self.__load(key, val)
+        FileStorage.__version += 1
+
+    def __reload_shards(self, force):
+        """Registers the shard files and reads those of loaded classes.
+
+        Args:
+            force (bool): Read the shards of loaded classes even if they did
+                not change.
+        """
+        try:
+            names = os.listdir(self.__shard_dir)
+        except FileNotFoundError:
+            return
+        for name in names:
+            if not name.endswith(self.__codec.extension):
+                continue
+            path = os.path.join(self.__shard_dir, name)
+            name = name[:-len(self.__codec.extension)]
+            if FileStorage.__by_class.get(name) or name in FileStorage.__raw:
+                FileStorage.__shards.pop(name, None)
+                stamp = self.__changed(path, force)
+                if stamp:
+                    self.__read(path, self.__lazy)
+                    FileStorage.__stamps[path] = stamp
+            else:
+                FileStorage.__shards[name] = path
+
+    def __load_class(self, name):
+        """Makes sure the objects of a class are loaded and built.
+
+        Args:
+            name (str): The class name.
+        """
+        if name in FileStorage.__shards:
+            self.__load_shard(name, self.__lazy)
+        if name in FileStorage.__raw:
+            self.__hydrate(name)
+
+    def __load_shard(self, name, raw):
+        """Reads the shard of a class registered by reload().
+
+        Objects created since the reload take precedence over the records
+        of the shard.
+
+        Args:
+            name (str): The class name.
+            raw (bool): Keep the JSON text of the records.
+        """
+        path = FileStorage.__shards.pop(name, None)
+        if path is None:
+            return
+        stamp = self.__changed(path, True)
+        if stamp:
+            self.__read(path, raw, keep=True)
+            FileStorage.__stamps[path] = stamp
+
+    def __changed(self, path, force):
+        """Returns the new stamp of a file that changed since it was stamped.
+
+        The inode, modification time and size are compared first; when
+        they differ, the content is fingerprinted, so that a file rewritten
+        with the same records is not read again.
+
+        Args:
+            path (str): The file to check.
+            force (bool): Return the stamp even if the file did not change.
+
+        Returns:
+            tuple: ``(stat, fingerprint)``, or None if the file did not
+            change or does not exist.
+        """
+        try:
+            st = os.stat(path)
+        except FileNotFoundError:
+            FileStorage.__stamps.pop(path, None)
+            return None
+        stat = (st.st_ino, st.st_mtime_ns, st.st_size)
+        old = FileStorage.__stamps.get(path)
+        if not force and old and old[0] == stat:
+            return None
+        digest = hashlib.blake2b(digest_size=16)
+        with open(path, 'rb') as f:
+            for chunk in iter(lambda: f.read(1 << 20), b''):
+                digest.update(chunk)
+        stamp = (stat, digest.digest())
+        if not force and old and old[1] == stamp[1]:
+            FileStorage.__stamps[path] = stamp
+            return None
+        return stamp
+
+    def __stamp(self, path):
+        """Records the stat of a file this process just wrote.
+
+        The content is not fingerprinted again; the file is read if its
+        stat changes.
+
+        Args:
+            path (str): The file written.
+        """
+        st = os.stat(path)
+        FileStorage.__stamps[path] = ((st.st_ino, st.st_mtime_ns, st.st_size),
+                                      None)
+
+    def __load(self, key, val):
+        """Builds the model of a record read from file and stores it.
+
+        The model is flagged clean, so that the shard of its class is not
+        written again until it changes.
+
+        Args:
+            key (str): Storage key, ``<class name>.<id>``.
+            val (dict): The record, as returned by to_dict().
+        """
+        obj = self.__classes()[val['__class__']](**val)
+        obj._dirty = False
+        self.__add(key, obj)
+
+    def __load_raw(self, key, val):
+        """Stores a record read from file without building its model.
+
+        Args:
+            key (str): Storage key, ``<class name>.<id>``.
+            val (str): The JSON text of the record.
+        """
+        self.__remove(key)
+        FileStorage.__raw.setdefault(key.split('.')[0], {})[key] = val
+
+    def __hydrate(self, name):
+        """Builds and stores the models of the raw records of a class.
+
+        Args:
+            name (str): The class name.
+        """
+        for key, val in FileStorage.__raw.pop(name, {}).items():
+            self.__load(key, self.__codec.decode(val))
+
+    def __add(self, key, obj):
+        """Stores obj under key and records it in the per-class index.
+
+        Args:
+            key (str): Storage key, ``<class name>.<id>``.
+            obj (BaseModel): The object to store.
+        """
+        if FileStorage.__raw:
+            FileStorage.__raw.get(key.split('.')[0], {}).pop(key, None)
+        old = FileStorage.__objects.get(key)
+        if old is not None and old is not obj:
+            FileStorage.__encoded.pop(key, None)
+            if type(old) is not type(obj):
+                FileStorage.__by_class.get(type(old).__name__, {}).pop(key,
+                                                                       None)
+        FileStorage.__objects[key] = obj
+        FileStorage.__by_class.setdefault(type(obj).__name__, {})[key] = obj
+        self.__unref(key)
+        refs = []
+        for name in FileStorage.__ref_names:
+            value = obj.__dict__.get(name)
+            if type(value) is str:
+                FileStorage.__refs.setdefault(type(obj).__name__, {}) \
+                    .setdefault(name, {}).setdefault(value, {})[key] = obj
+                refs.append((name, value))
+        if refs:
+            FileStorage.__ref_keys[key] = (type(obj).__name__, refs)
+
+    def __unref(self, key):
+        """Removes the foreign key index entries of the object under key.
+
+        Args:
+            key (str): Storage key, ``<class name>.<id>``.
+        """
+        cls, refs = FileStorage.__ref_keys.pop(key, (None, ()))
+        for name, value in refs:
+            index = FileStorage.__refs[cls][name]
+            index[value].pop(key, None)
+            if not index[value]:
+                del index[value]
+
+    def __remove(self, key):
+        """Removes the object stored under key and its index entry.
+
+        Args:
+            key (str): Storage key, ``<class name>.<id>``.
+
+        Returns:
+            bool: True if an object was removed.
+        """
+        FileStorage.__encoded.pop(key, None)
+        obj = FileStorage.__objects.pop(key, None)
+        if obj is None:
+            raw = FileStorage.__raw.get(key.split('.')[0], {})
+            return raw.pop(key, None) is not None
+        FileStorage.__by_class.get(type(obj).__name__, {}).pop(key, None)
+        self.__unref(key)
+        return True
+
+    def __write(self):
+        """Writes the storage file, or appends to the journal.
+
+        The whole dictionary is written to a temporary file which then
+        replaces the storage file, so that a crash cannot leave it
+        truncated. Only dirty objects are encoded again, the others are
+        written from the cache. In journal mode the pending changes are
+        appended to the journal instead, until it needs compacting. With
+        shards, only the changed shards are written.
+        """
+        if FileStorage.__encoded_by is not self.__codec:
+            FileStorage.__encoded.clear()
+            FileStorage.__encoded_by = self.__codec
+        if self.__shard_dir:
+            self.__write_shards()
+            return
+        if self.__journal and self.__append_journal() < self.__journal_size:
+            return
+        FileStorage.__pending = {}
+        temp = []
+        for key, val in list(FileStorage.__objects.items()):
+            temp.append(self.__encode(key, val))
+        for raw in list(FileStorage.__raw.values()):
+            for key, val in list(raw.items()):
+                temp.append(self.__codec.member(key, val))
+        self.__dump(self.__path, temp)
+        FileStorage.__stamps.pop(self.__path + '.journal', None)
+        try:
+            os.remove(self.__path + '.journal')
+        except FileNotFoundError:
+            pass
+
+    def __write_shards(self):
+        """Rewrites the shards of the classes with changed objects.
+
+        A class changed when one of its objects was added or deleted since
+        the last write, or when one of its objects is dirty. Records of the
+        shard not read yet are read first so that they are written back.
+        """
+        pending = FileStorage.__pending
+        FileStorage.__pending = {}
+        names = set(key.split('.')[0] for key in pending)
+        for name, objs in list(FileStorage.__by_class.items()):
+            if name not in names:
+                for obj in list(objs.values()):
+                    if getattr(obj, '_dirty', True):
+                        names.add(name)
+                        break
+        if names:
+            os.makedirs(self.__shard_dir, exist_ok=True)
+        for name in names:
+            if name in FileStorage.__shards:
+                self.__load_shard(name, True)
+            temp = []
+            for key, val in list(FileStorage.__by_class.get(name,
+                                                            {}).items()):
+                temp.append(self.__encode(key, val))
+            for key, val in list(FileStorage.__raw.get(name, {}).items()):
+                temp.append(self.__codec.member(key, val))
+            self.__dump(os.path.join(self.__shard_dir,
+                                     name + self.__codec.extension), temp)
+
+    def __dump(self, path, temp):
+        """Writes a storage file made of encoded members to path.
+
+        The file is written to a temporary file which then replaces path,
+        so that a crash cannot leave it truncated.
+
+        Args:
+            path (str): The file to write.
+            temp (list): The members, as encoded by the codec.
+        """
+        with open(path + '.tmp', 'wb' if self.__codec.binary else 'w') as f:
+            self.__codec.write(f, temp)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(path + '.tmp', path)
+        self.__stamp(path)
+
+    def __encode(self, key, obj):
+        """Returns the member of the storage file encoding obj.
+
+        The cached member is reused while the object is clean; otherwise
+        the object is encoded, cached and flagged clean.
+
+        Args:
+            key (str): Storage key, ``<class name>.<id>``.
+            obj (BaseModel): The stored object.
+
+        Returns:
+            The member, as encoded by the codec.
+        """
+        text = FileStorage.__encoded.get(key)
+        if text is None or getattr(obj, '_dirty', True):
+            # Cleared first so that a write made while encoding marks the
+            # object dirty again.
+            obj._dirty = False
+            text = self.__codec.encode(key, obj.to_dict())
+            FileStorage.__encoded[key] = text
+        return text
+
+    def __append_journal(self):
+        """Appends the pending changes to the journal.
+
+        The changes are the objects added or deleted since the last write,
+        and the objects whose ``_dirty`` flag is set. Each change is one
+        line holding ``[key, dictionary]``, or ``[key, null]`` for a
+        deleted object.
+
+        Returns:
+            int: The size of the journal in bytes.
+        """
+        lines = []
+        pending = FileStorage.__pending
+        FileStorage.__pending = {}
+        for key, obj in list(FileStorage.__objects.items()):
+            if key not in pending and getattr(obj, '_dirty', True):
+                pending[key] = obj
+        for key, val in pending.items():
+            if val is not None:
+                # The cached encoding no longer matches the object.
+                FileStorage.__encoded.pop(key, None)
+                val._dirty = False
+            lines.append(json.dumps([key, val and val.to_dict()]) + '\n')
+        path = self.__path + '.journal'
+        try:
+            st = os.stat(path)
+            stat = (st.st_ino, st.st_mtime_ns, st.st_size)
+        except FileNotFoundError:
+            stat = None
+        # Records appended by another process must still be replayed.
+        synced = FileStorage.__stamps.get(path, (None,))[0] == stat
+        with open(path, 'ab+') as f:
+            if f.tell():
+                f.seek(-1, os.SEEK_END)
+                if f.read(1) != b'\n':
+                    # Keep the torn record of a crashed save on its own line
+                    lines.insert(0, '\n')
+            f.write(''.join(lines).encode('utf-8'))
+            size = f.tell()
+        if synced:
+            self.__stamp(path)
+        return size
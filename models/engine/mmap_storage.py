@@ -0,0 +1,425 @@
+#!/usr/bin/python3
+"""MmapStorage Module
+
+This module defines a read-only storage engine for the web workers. The
+JSON snapshot written by FileStorage is memory-mapped instead of parsed,
+so that every worker process shares the same page-cache pages, and the
+records are decoded on demand through an offset index.
+
+Attributes:
+    INDEX_MAGIC (bytes): First bytes of an index file.
+
+Classes:
+    MmapStorage: Read-only storage over a memory-mapped snapshot.
+"""
+import io
+import json
+import mmap
+import os
+import struct
+from models.engine.codec import iter_json_items
+from models.engine.query import FileQuery
+
+INDEX_MAGIC = b'HBNBIDX\x02'
+
+
+class MmapStorage:
+    """Read-only storage over a memory-mapped snapshot
+
+    The offset index lives next to the snapshot, in ``file.json.idx``, and
+    is memory-mapped as well. It starts with ``INDEX_MAGIC`` and a
+    ``<QQQIIII`` header: the inode, modification time and size of the
+    snapshot it was built from, the width of the id field, the length of
+    the class table, the width of the foreign key field and the length of
+    the foreign key table. The class table is a JSON object mapping each
+    class name to the ``[first, count]`` range of its entries; the foreign
+    key table maps each class name, then each foreign key (``state_id``,
+    ``city_id``, ``place_id`` and ``user_id``) to the range of its
+    references. The tables are followed by the entries, sorted by class
+    and id, each holding the id padded with NUL bytes to the width, then
+    the ``<QI`` offset and length of the JSON text of the record in the
+    snapshot. The references come last, sorted by foreign key value, each
+    holding the value padded to its width, then the ``<I`` number of the
+    entry of the record, so that related() only decodes the matching
+    records.
+
+    The index is rebuilt by the first worker that finds it missing or
+    built from another snapshot. Journals and shards are not read: the
+    snapshot should be written by a FileStorage with journal mode off and
+    no shard directory.
+    """
+    __file_path = 'file.json'
+    __header = struct.Struct('<QQQIIII')
+    __entry = struct.Struct('<QI')
+    __ref = struct.Struct('<I')
+    __ref_names = ('state_id', 'city_id', 'place_id', 'user_id')
+    __models = None
+
+    def __init__(self):
+        """Initializes an empty, unmapped storage."""
+        self.__stat = None
+        self.__data = None
+        self.__index = None
+        self.__table = {}
+        self.__width = 0
+        self.__entries = 0
+        self.__refs = {}
+        self.__ref_width = 0
+        self.__ref_entries = 0
+        self.__version = 0
+
+    def all(self, cls=None):
+        """Returns a dictionary of the models in the snapshot
+
+        The models are decoded from the mapping on every call and are not
+        kept by the storage.
+
+        Args:
+            cls (class or str, optional): Only return objects of this class.
+                The class name may be given instead of the class itself.
+
+        Returns:
+            dict: The objects by ``<class name>.<id>`` key.
+        """
+        if cls:
+            names = [cls if type(cls) is str else cls.__name__]
+        else:
+            names = list(self.__table)
+        objects = {}
+        for name in names:
+            first, count = self.__table.get(name, (0, 0))
+            for i in range(first, first + count):
+                obj = self.__decode(i)
+                objects[name + '.' + obj.id] = obj
+        return objects
+
+    def iter(self, cls=None, batch_size=1000):
+        """Yields the models of the snapshot one by one.
+
+        Each record is decoded from the mapping as it is yielded, so a pass
+        over the whole snapshot holds one model at a time.
+
+        Args:
+            cls (class or str, optional): Only yield objects of this class.
+                The class name may be given instead of the class itself.
+            batch_size (int, optional): Accepted for compatibility with
+                DBStorage; records are decoded one at a time.
+
+        Yields:
+            BaseModel: The objects, sorted by class and id.
+        """
+        if cls:
+            names = [cls if type(cls) is str else cls.__name__]
+        else:
+            names = list(self.__table)
+        for name in names:
+            first, count = self.__table.get(name, (0, 0))
+            for i in range(first, first + count):
+                yield self.__decode(i)
+
+    def get(self, cls, id):
+        """Returns the object of a class with the given id.
+
+        The entry of the object is found by binary search in the index.
+
+        Args:
+            cls (class or str): The class of the object, or its name.
+            id (str): The id of the object.
+
+        Returns:
+            BaseModel: The object, or None if there is none.
+        """
+        name = cls if type(cls) is str else cls.__name__
+        first, count = self.__table.get(name, (0, 0))
+        target = str(id).encode('utf-8')
+        if len(target) > self.__width:
+            return None
+        target = target.ljust(self.__width, b'\0')
+        stride = self.__width + self.__entry.size
+        i = self.__bisect(self.__entries, stride, self.__width, first,
+                          first + count, target)
+        pos = self.__entries + i * stride
+        if (i < first + count and
+                self.__index[pos:pos + self.__width] == target):
+            return self.__decode(i)
+        return None
+
+    def count(self, cls=None):
+        """Returns the number of objects in the snapshot.
+
+        Args:
+            cls (class or str, optional): Only count objects of this class.
+                The class name may be given instead of the class itself.
+
+        Returns:
+            int: The number of objects, read from the index.
+        """
+        if cls:
+            name = cls if type(cls) is str else cls.__name__
+            return self.__table.get(name, (0, 0))[1]
+        return sum(count for first, count in self.__table.values())
+
+    def query(self, cls):
+        """Returns a query of the objects of a class.
+
+        Args:
+            cls (class or str): The class queried, or its name.
+
+        Returns:
+            FileQuery: The query; see models.engine.query.
+        """
+        return FileQuery(self, cls)
+
+    def related(self, cls, name, value):
+        """Returns the objects of a class whose foreign key has a value.
+
+        The references of a foreign key are found by binary search in the
+        index, and only their records are decoded. Other fields are
+        matched by decoding every record of the class.
+
+        Args:
+            cls (class or str): The class of the objects, or its name.
+            name (str): The foreign key, such as ``state_id``.
+            value (str): The id the foreign key must hold.
+
+        Returns:
+            dict: The matching objects by key.
+        """
+        cls = cls if type(cls) is str else cls.__name__
+        if name not in MmapStorage.__ref_names:
+            return {key: obj for key, obj in self.all(cls).items()
+                    if obj.__dict__.get(name) == value}
+        first, count = self.__refs.get(cls, {}).get(name, (0, 0))
+        target = str(value).encode('utf-8')
+        if len(target) > self.__ref_width:
+            return {}
+        target = target.ljust(self.__ref_width, b'\0')
+        stride = self.__ref_width + self.__ref.size
+        i = self.__bisect(self.__ref_entries, stride, self.__ref_width,
+                          first, first + count, target)
+        objects = {}
+        pos = self.__ref_entries + i * stride
+        while (i < first + count and
+               self.__index[pos:pos + self.__ref_width] == target):
+            obj = self.__decode(self.__ref.unpack_from(
+                self.__index, pos + self.__ref_width)[0])
+            objects[cls + '.' + obj.id] = obj
+            i += 1
+            pos += stride
+        return objects
+
+    def new(self, obj):
+        """Refuses to add an object: the storage is read-only"""
+        raise io.UnsupportedOperation("Storage is read-only")
+
+    def new_many(self, objs, batch_size=1000):
+        """Refuses to add objects: the storage is read-only"""
+        raise io.UnsupportedOperation("Storage is read-only")
+
+    def save(self):
+        """Refuses to save: the storage is read-only"""
+        raise io.UnsupportedOperation("Storage is read-only")
+
+    def delete(self, obj=None):
+        """Refuses to delete an object: the storage is read-only"""
+        if obj is not None:
+            raise io.UnsupportedOperation("Storage is read-only")
+
+    def version(self):
+        """Returns the number of snapshots mapped.
+
+        Caches of data read from the storage are stale once it changes.
+        """
+        return self.__version
+
+    def reload(self, force=False):
+        """Maps the snapshot and its index.
+
+        Nothing is done while the snapshot keeps the inode, modification
+        time and size it had when it was mapped, unless force is set. A
+        replaced snapshot is mapped again; the previous mapping stays valid
+        until then.
+
+        Args:
+            force (bool, optional): Map the snapshot even if it did not
+                change.
+
+        Raises:
+            ValueError: If the snapshot is not a JSON object.
+        """
+        path = MmapStorage.__file_path
+        try:
+            f = open(path, 'rb')
+        except FileNotFoundError:
+            if self.__stat is not None:
+                self.__version += 1
+            self.__stat = self.__data = self.__index = None
+            self.__table = {}
+            self.__refs = {}
+            return
+        with f:
+            st = os.fstat(f.fileno())
+            stat = (st.st_ino, st.st_mtime_ns, st.st_size)
+            if stat == self.__stat and not force:
+                return
+            if not st.st_size:
+                raise ValueError("Empty storage file")
+            index = self.__map_index(path + '.idx', stat)
+            if index is None:
+                self.__build_index(f, path + '.idx', stat)
+                index = self.__map_index(path + '.idx', stat)
+            data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        self.__stat = stat
+        self.__data = data
+        self.__index = index
+        self.__version += 1
+
+    def close(self):
+        """Maps the snapshot again if it was replaced."""
+        self.reload()
+
+    def __classes(self):
+        """Returns the model classes by name"""
+        if MmapStorage.__models is None:
+            from models.base_model import BaseModel
+            from models.user import User
+            from models.place import Place
+            from models.state import State
+            from models.city import City
+            from models.amenity import Amenity
+            from models.review import Review
+
+            MmapStorage.__models = {
+                'BaseModel': BaseModel, 'User': User, 'Place': Place,
+                'State': State, 'City': City, 'Amenity': Amenity,
+                'Review': Review
+            }
+        return MmapStorage.__models
+
+    def __bisect(self, start, stride, width, low, high, target):
+        """Returns the first entry of a sorted range not below target.
+
+        Args:
+            start (int): Position of the first entry in the index.
+            stride (int): Size of an entry.
+            width (int): Size of the padded value opening each entry.
+            low (int): First entry of the range.
+            high (int): Entry after the range.
+            target (bytes): The padded value searched.
+
+        Returns:
+            int: The number of the entry, high if all are below target.
+        """
+        while low < high:
+            middle = (low + high) // 2
+            pos = start + middle * stride
+            if self.__index[pos:pos + width] < target:
+                low = middle + 1
+            else:
+                high = middle
+        return low
+
+    def __decode(self, i):
+        """Builds the model of the record of the i-th index entry."""
+        pos = self.__entries + i * (self.__width + self.__entry.size)
+        offset, length = self.__entry.unpack_from(self.__index,
+                                                  pos + self.__width)
+        val = json.loads(self.__data[offset:offset + length])
+        return self.__classes()[val['__class__']](**val)
+
+    def __map_index(self, path, stat):
+        """Maps the index file if it was built from the given snapshot.
+
+        Args:
+            path (str): Path of the index file.
+            stat (tuple): Inode, modification time and size of the snapshot.
+
+        Returns:
+            mmap: The mapped index, or None if it is missing or stale.
+        """
+        try:
+            with open(path, 'rb') as f:
+                index = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except (FileNotFoundError, ValueError):
+            return None
+        start = len(INDEX_MAGIC)
+        if (index[:start] != INDEX_MAGIC or
+                len(index) < start + self.__header.size):
+            index.close()
+            return None
+        header = self.__header.unpack_from(index, start)
+        if header[:3] != stat:
+            index.close()
+            return None
+        start += self.__header.size
+        self.__width, size, self.__ref_width, ref_size = header[3:]
+        self.__table = json.loads(index[start:start + size])
+        start += size
+        self.__refs = json.loads(index[start:start + ref_size])
+        self.__entries = start + ref_size
+        self.__ref_entries = self.__entries + sum(
+            count for first, count in self.__table.values()) * (
+                self.__width + self.__entry.size)
+        return index
+
+    def __build_index(self, f, path, stat):
+        """Writes the offset index of a snapshot.
+
+        The snapshot is read as Latin-1, so that the positions of the
+        parser are byte offsets, and the keys are decoded back from UTF-8.
+        The records are then decoded once to index their foreign keys.
+
+        Args:
+            f (file): The snapshot, opened in binary mode.
+            path (str): Path of the index file.
+            stat (tuple): Inode, modification time and size of the snapshot.
+        """
+        f.seek(0)
+        text = io.TextIOWrapper(f, encoding='latin-1', newline='')
+        entries = []
+        try:
+            for key, (start, end) in iter_json_items(text, spans=True):
+                key = key.encode('latin-1').decode('utf-8')
+                name, _, obj_id = key.partition('.')
+                entries.append((name, obj_id.encode('utf-8'), start,
+                                end - start))
+        finally:
+            text.detach()
+        entries.sort()
+        width = max([len(entry[1]) for entry in entries] or [0])
+        table = {}
+        body = bytearray()
+        values = {}
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+            for i, (name, obj_id, offset, length) in enumerate(entries):
+                table.setdefault(name, [i, 0])[1] += 1
+                body += obj_id.ljust(width, b'\0')
+                body += self.__entry.pack(offset, length)
+                val = json.loads(data[offset:offset + length])
+                for ref in MmapStorage.__ref_names:
+                    if type(val.get(ref)) is str:
+                        values.setdefault((name, ref), []).append(
+                            (val[ref].encode('utf-8'), i))
+        ref_width = max([len(value) for refs in values.values()
+                         for value, i in refs] or [0])
+        refs = {}
+        ref_body = bytearray()
+        first = 0
+        for (name, ref), found in sorted(values.items()):
+            refs.setdefault(name, {})[ref] = [first, len(found)]
+            first += len(found)
+            for value, i in sorted(found):
+                ref_body += value.ljust(ref_width, b'\0')
+                ref_body += self.__ref.pack(i)
+        table = json.dumps(table).encode('utf-8')
+        refs = json.dumps(refs).encode('utf-8')
+        temp = '{}.{}.tmp'.format(path, os.getpid())
+        with open(temp, 'wb') as out:
+            out.write(INDEX_MAGIC)
+            out.write(self.__header.pack(*stat, width, len(table),
+                                         ref_width, len(refs)))
+            out.write(table)
+            out.write(refs)
+            out.write(body)
+            out.write(ref_body)
+        os.replace(temp, path)
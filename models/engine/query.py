@@ -0,0 +1,663 @@
+#!/usr/bin/python3
+"""Query Module
+
+This module defines the queries returned by ``storage.query(cls)``. A
+query is built by chaining filter(), order_by(), limit() and offset(),
+each returning a new query, and only runs when its results are requested
+through all(), first() or iteration.
+
+Criteria are keyword arguments: ``name="California"`` tests equality, and
+a suffix after a double underscore picks another comparison, as in
+``price_by_night__gte=100`` or ``id__in=[...]``. Fields are ordered in
+ascending order, or descending when prefixed with ``-``.
+
+load() names the relationships the caller is going to read, from the
+loading profiles below, so that DBStorage fetches them with the query
+instead of issuing one SELECT per object when they are first read.
+
+page() returns one page of a query in keyset order, ``(name, id)`` by
+default: a page starts right after the last row of the previous one
+instead of skipping OFFSET rows, so that a deep page costs the same as
+the first. The position is carried by opaque cursors.
+
+aggregate() returns the number of objects and statistics of numeric
+fields, such as the average price_by_night, for each value of a field,
+such as city_id. DBStorage runs it as a SQL GROUP BY; FileStorage
+gathers each field into an array column per group.
+
+DBStorage may keep the results of its queries in a QueryCache, from
+models.engine.cache, keyed by the description returned by key().
+
+Classes:
+    Query: The criteria of a query, shared by the engines.
+    Page: A page of the results of a query.
+    FileQuery: Runs a query over the objects of a file storage.
+    DBQuery: Compiles a query to SQL for DBStorage.
+
+Functions:
+    percentile: Interpolates a percentile of sorted values.
+    summarize: Computes the statistics of a column of values.
+
+Attributes:
+    comparisons (dict): The comparison functions by suffix.
+    groupings (dict): The fields a class can be grouped by through a
+        foreign key, by ``(class name, field)``: the foreign key, the
+        class it references and the field of that class.
+    profiles (dict): The loading profiles by name. Each one is a list of
+        ``(class name, path)`` pairs, a path being the
+        ``(relationship, loader)`` steps loaded from that class.
+"""
+import base64
+import binascii
+import copy
+import heapq
+import json
+import math
+import operator
+import re
+from array import array
+from sqlalchemy import and_, func, or_
+from sqlalchemy.orm import joinedload, selectinload
+
+comparisons = {
+    'eq': operator.eq, 'ne': operator.ne,
+    'lt': operator.lt, 'lte': operator.le,
+    'gt': operator.gt, 'gte': operator.ge,
+    'in': lambda value, values: value in values
+}
+
+profiles = {
+    'cities': [('State', [('cities', selectinload)])],
+    'user': [('Place', [('user', joinedload)]),
+             ('Review', [('user', joinedload)])],
+    'amenities': [('Place', [('amenities', selectinload)])],
+    'reviews': [('Place', [('reviews', selectinload),
+                           ('user', joinedload)])]
+}
+
+
+groupings = {
+    ('Place', 'state_id'): ('city_id', 'City', 'state_id')
+}
+
+
+def percentile(values, q):
+    """Interpolates a percentile of sorted values.
+
+    Args:
+        values (sequence): The values, in ascending order.
+        q (float): The fraction of the values below the percentile, 0.5
+            for the median.
+
+    Returns:
+        float: The percentile, or None without values.
+    """
+    if not values:
+        return None
+    pos = (len(values) - 1) * q
+    low = int(pos)
+    high = min(low + 1, len(values) - 1)
+    return values[low] + (values[high] - values[low]) * (pos - low)
+
+
+def summarize(values, stats):
+    """Computes the statistics of a column of values.
+
+    Args:
+        values (array): The values, in any order.
+        stats (list): Names of statistics: min, max, avg or pNN.
+
+    Returns:
+        dict: The statistics by name, as floats, or None without values.
+    """
+    if any(stat[0] == 'p' for stat in stats):
+        values = sorted(values)
+    summary = {}
+    for stat in stats:
+        if not values:
+            summary[stat] = None
+        elif stat == 'min':
+            summary[stat] = float(min(values))
+        elif stat == 'max':
+            summary[stat] = float(max(values))
+        elif stat == 'avg':
+            summary[stat] = math.fsum(values) / len(values)
+        else:
+            summary[stat] = percentile(values, int(stat[1:]) / 100)
+    return summary
+
+
+class Page:
+    """A page of the results of a query
+
+    Attributes:
+        items (list): The objects of the page.
+        next (str): The cursor of the next page, or None on the last one.
+        prev (str): The cursor of the previous page, or None on the first
+            one.
+    """
+
+    def __init__(self, items, next=None, prev=None):
+        """Initializes a page.
+
+        Args:
+            items (list): The objects of the page.
+            next (str, optional): The cursor of the next page.
+            prev (str, optional): The cursor of the previous page.
+        """
+        self.items = items
+        self.next = next
+        self.prev = prev
+
+    def __iter__(self):
+        """Iterates over the objects of the page."""
+        return iter(self.items)
+
+    def __len__(self):
+        """Returns the number of objects of the page."""
+        return len(self.items)
+
+
+class Query:
+    """Criteria of a query
+
+    Attributes:
+        _source: What the query runs against, given by the storage.
+        _cls (class or str): The class queried, or its name.
+        _criteria (list): ``(field, comparison, value)`` triples.
+        _order (list): ``(field, descending)`` pairs.
+        _limit (int): Maximum number of results, or None.
+        _offset (int): Number of results skipped.
+        _load (list): Names of the loading profiles applied.
+        _seek (tuple): ``(fields, values, descending)`` when only the
+            objects after values, in the order of fields, are returned.
+    """
+
+    def __init__(self, source, cls):
+        """Initializes a query of every object of a class.
+
+        Args:
+            source: What the query runs against, given by the storage.
+            cls (class or str): The class queried, or its name.
+        """
+        self._source = source
+        self._cls = cls
+        self._criteria = []
+        self._order = []
+        self._limit = None
+        self._offset = 0
+        self._load = []
+        self._seek = None
+
+    def filter(self, **criteria):
+        """Returns the query restricted to the objects matching criteria.
+
+        Raises:
+            ValueError: If a comparison suffix is unknown.
+        """
+        query = self.__copy()
+        for lookup, value in criteria.items():
+            name, _, comparison = lookup.partition('__')
+            comparison = comparison or 'eq'
+            if comparison not in comparisons:
+                raise ValueError("Unknown comparison {!r}".format(lookup))
+            query._criteria.append((name, comparison, value))
+        return query
+
+    def order_by(self, *fields):
+        """Returns the query ordered by fields, ``-field`` descending."""
+        query = self.__copy()
+        for name in fields:
+            query._order.append((name.lstrip('-'), name.startswith('-')))
+        return query
+
+    def limit(self, count):
+        """Returns the query returning at most count objects."""
+        query = self.__copy()
+        query._limit = count
+        return query
+
+    def offset(self, count):
+        """Returns the query skipping its first count objects."""
+        query = self.__copy()
+        query._offset = count
+        return query
+
+    def load(self, *names):
+        """Returns the query loading the relationships of profiles.
+
+        Raises:
+            ValueError: If a profile is unknown.
+        """
+        query = self.__copy()
+        for name in names:
+            if name not in profiles:
+                raise ValueError("Unknown loading profile {!r}".format(name))
+            query._load.append(name)
+        return query
+
+    def all(self):
+        """Returns the list of the objects matching the query."""
+        raise NotImplementedError
+
+    def first(self):
+        """Returns the first object matching the query, or None."""
+        objs = self.limit(1).all()
+        return objs[0] if objs else None
+
+    def __iter__(self):
+        """Iterates over the objects matching the query."""
+        return iter(self.all())
+
+    def aggregate(self, by, fields=(), stats=('min', 'max', 'avg')):
+        """Returns statistics of fields for each value of a field.
+
+        The order, limit, offset and page of the query are ignored. Like
+        SQL, missing values are left out of the statistics of a field.
+
+        Args:
+            by (str): The field grouped by, or one of groupings, such as
+                ``state_id`` for a Place.
+            fields (iterable, optional): The numeric fields summarized.
+            stats (iterable, optional): Names of the statistics: min, max,
+                avg, or pNN for the NNth percentile, such as p50 or p90.
+
+        Returns:
+            dict: For each value of by, a dictionary holding the ``count``
+            of objects, and for each field the dictionary of its statistics
+            returned by summarize().
+
+        Raises:
+            ValueError: If a statistic is unknown.
+        """
+        stats = list(stats)
+        for stat in stats:
+            if (stat not in ('min', 'max', 'avg') and
+                    not re.fullmatch(r'p(100|[1-9]?[0-9])', stat)):
+                raise ValueError("Unknown statistic {!r}".format(stat))
+        query = self.__copy()
+        query._order = []
+        query._limit = None
+        query._offset = 0
+        query._seek = None
+        return query._aggregate(by, list(fields), stats)
+
+    def _aggregate(self, by, fields, stats):
+        """Computes the statistics of aggregate() for the query."""
+        raise NotImplementedError
+
+    def page(self, size, cursor=None, fields=('name', 'id')):
+        """Returns a page of the objects matching the query.
+
+        The objects are ordered by fields, which should end with a unique
+        one, and the order of the query is replaced.
+
+        Args:
+            size (int): Maximum number of objects of the page.
+            cursor (str, optional): The next or prev cursor of another
+                page of the same query; None for the first page.
+            fields (tuple, optional): The fields of the order.
+
+        Returns:
+            Page: The page.
+
+        Raises:
+            ValueError: If the cursor is not one of this query.
+        """
+        forward, values = True, None
+        if cursor:
+            forward, values = self.__decode(cursor, len(fields))
+        query = self.__copy()
+        query._order = [(name, not forward) for name in fields]
+        if values is not None:
+            query._seek = (tuple(fields), values, not forward)
+        query._limit = size + 1
+        query._offset = 0
+        items = query.all()
+        more = len(items) > size
+        items = items[:size]
+        if not forward:
+            items.reverse()
+        if not items:
+            return Page(items)
+        first = [getattr(items[0], name, None) for name in fields]
+        last = [getattr(items[-1], name, None) for name in fields]
+        return Page(items,
+                    self.__encode(True, last) if more or not forward
+                    else None,
+                    self.__encode(False, first) if values and
+                    (more or forward) else None)
+
+    @staticmethod
+    def __encode(forward, values):
+        """Returns the cursor of the objects after or before values."""
+        text = json.dumps(['>' if forward else '<', values], default=str)
+        return base64.urlsafe_b64encode(text.encode('utf-8')) \
+            .decode('ascii').rstrip('=')
+
+    @staticmethod
+    def __decode(cursor, count):
+        """Returns the direction and values of a cursor."""
+        try:
+            text = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4))
+            direction, values = json.loads(text)
+        except (binascii.Error, UnicodeDecodeError, TypeError, ValueError):
+            raise ValueError("Invalid cursor {!r}".format(cursor))
+        if (direction not in ('>', '<') or type(values) is not list or
+                len(values) != count or
+                any(type(value) not in (str, int, float, type(None))
+                    for value in values)):
+            raise ValueError("Invalid cursor {!r}".format(cursor))
+        return direction == '>', values
+
+    def key(self):
+        """Returns a hashable description of the query."""
+        name = self._cls if type(self._cls) is str else self._cls.__name__
+        criteria = tuple(
+            (field, comparison,
+             tuple(value) if comparison == 'in' else value)
+            for field, comparison, value in self._criteria)
+        seek = self._seek and (self._seek[0], tuple(self._seek[1]),
+                               self._seek[2])
+        return (name, criteria, tuple(self._order), self._limit,
+                self._offset, tuple(sorted(set(self._load))), seek)
+
+    def __copy(self):
+        """Returns a copy of the query that can be changed."""
+        query = copy.copy(self)
+        query._criteria = list(self._criteria)
+        query._order = list(self._order)
+        query._load = list(self._load)
+        return query
+
+
+class FileQuery(Query):
+    """Query over the objects of a file storage
+
+    The first equality criterion is answered by the ``related()`` method
+    of the storage, which uses its foreign key index when there is one;
+    the other criteria are tested on each object. A limited ordered query
+    only keeps its first rows while sorting.
+
+    Like SQL, a comparison with a missing value is false, except for
+    equality with None. Loading profiles have nothing to do: the
+    relationships of file mode are index lookups.
+    """
+
+    def all(self):
+        """Returns the list of the objects matching the query."""
+        objs = None
+        criteria = list(self._criteria)
+        for i, (name, comparison, value) in enumerate(criteria):
+            if comparison == 'eq' and type(value) is str:
+                objs = self._source.related(self._cls, name, value).values()
+                del criteria[i]
+                break
+        if objs is None:
+            objs = self._source.all(self._cls).values()
+        tests = [(name, comparisons[comparison], value)
+                 for name, comparison, value in criteria]
+        objs = [obj for obj in objs if all(
+            self.__match(obj.__dict__.get(name), test, value)
+            for name, test, value in tests)]
+        if self._seek:
+            objs = [obj for obj in objs if self.__after(obj)]
+        return self.__sort(objs)[self._offset:self.__end()]
+
+    def _aggregate(self, by, fields, stats):
+        """Computes the statistics of aggregate() for the query.
+
+        The values of each field are extracted into an array column per
+        group, which summarize() then reduces.
+        """
+        group = self.__grouper(by)
+        counts = {}
+        columns = {}
+        for obj in self.all():
+            key = group(obj)
+            counts[key] = counts.get(key, 0) + 1
+            if key not in columns:
+                columns[key] = [array('d') for name in fields]
+            for column, name in zip(columns[key], fields):
+                value = obj.__dict__.get(name)
+                if value is not None:
+                    column.append(value)
+        results = {}
+        for key, count in counts.items():
+            results[key] = {'count': count}
+            for name, column in zip(fields, columns[key]):
+                results[key][name] = summarize(column, stats)
+        return results
+
+    def __grouper(self, by):
+        """Returns the function giving the group of an object."""
+        name = self._cls if type(self._cls) is str else self._cls.__name__
+        if (name, by) not in groupings:
+            return lambda obj: obj.__dict__.get(by)
+        key, cls, field = groupings[(name, by)]
+        found = {}
+
+        def group(obj):
+            """Returns the field of the object referenced by obj"""
+            value = obj.__dict__.get(key)
+            if value not in found:
+                other = value and self._source.get(cls, value)
+                found[value] = other and other.__dict__.get(field)
+            return found[value]
+        return group
+
+    def __end(self):
+        """Returns the index past the last object returned, or None."""
+        if self._limit is None:
+            return None
+        return self._offset + self._limit
+
+    def __sort(self, objs):
+        """Returns the objects in the order of the query."""
+        if not self._order:
+            return objs
+        if len(set(desc for name, desc in self._order)) > 1:
+            # Mixed directions: stable sorts from the last field.
+            for name, desc in reversed(self._order):
+                objs.sort(key=lambda obj: self.__key(obj, name),
+                          reverse=desc)
+            return objs
+        names = [name for name, desc in self._order]
+        desc = self._order[0][1]
+
+        def key(obj):
+            """Returns the sort key of an object"""
+            return tuple(self.__key(obj, name) for name in names)
+
+        end = self.__end()
+        if end is not None and end < len(objs):
+            pick = heapq.nlargest if desc else heapq.nsmallest
+            return pick(end, objs, key=key)
+        return sorted(objs, key=key, reverse=desc)
+
+    def __after(self, obj):
+        """Tells whether an object comes after the seek position.
+
+        Raises:
+            ValueError: If a value of the cursor cannot be compared with
+                the field, such as a number for a name.
+        """
+        fields, values, desc = self._seek
+        keys = [self.__key(obj, name) for name in fields]
+        seek = [(value is None, value) for value in values]
+        try:
+            return keys < seek if desc else keys > seek
+        except TypeError:
+            raise ValueError("Invalid cursor values {!r}".format(values))
+
+    @staticmethod
+    def __key(obj, name):
+        """Returns the sort key of a field, missing values last."""
+        value = obj.__dict__.get(name)
+        return (value is None, value)
+
+    @staticmethod
+    def __match(value, test, expected):
+        """Tells whether a field passes a comparison."""
+        if value is None:
+            return test is operator.eq and expected is None
+        try:
+            return test(value, expected)
+        except TypeError:
+            return False
+
+
+class DBQuery(Query):
+    """Query compiled to SQL WHERE, ORDER BY, LIMIT and OFFSET clauses
+
+    The source is the SQLAlchemy session of DBStorage and the class must
+    be a mapped model class. Loading profiles become selectinload or
+    joinedload options: one more SELECT per collection for all the rows,
+    or a JOIN for a many-to-one relationship.
+
+    With a cache, the results are read from it and stored in it, along
+    with the names of the classes they were loaded from.
+    """
+
+    def __init__(self, source, cls, cache=None):
+        """Initializes a query of every object of a class.
+
+        Args:
+            source (Session): The session the query runs in.
+            cls (class): The mapped class queried.
+            cache (QueryCache, optional): The cache of the results.
+        """
+        super().__init__(source, cls)
+        self._cache = cache
+
+    def all(self):
+        """Returns the list of the objects matching the query."""
+        if self._cache is None:
+            return self.statement().all()
+        return self._cache.get(self.key(), self.classes(),
+                               lambda: self.statement().all())
+
+    def classes(self):
+        """Returns the names of the classes the results are loaded from."""
+        names = {self._cls.__name__}
+        for name in self._load:
+            for cls_name, path in profiles[name]:
+                if cls_name != self._cls.__name__:
+                    continue
+                owner = self._cls
+                for step, loader in path:
+                    owner = getattr(owner, step).property.mapper.class_
+                    names.add(owner.__name__)
+        return names
+
+    def statement(self):
+        """Returns the SQLAlchemy query the criteria compile to."""
+        query = self.__where(self._source.query(self._cls))
+        for name, desc in self._order:
+            column = getattr(self._cls, name)
+            query = query.order_by(column.desc() if desc else column)
+        if self._limit is not None:
+            query = query.limit(self._limit)
+        if self._offset:
+            query = query.offset(self._offset)
+        for name in self._load:
+            for cls_name, path in profiles[name]:
+                if cls_name == self._cls.__name__:
+                    query = query.options(self.__option(path))
+        return query
+
+    def _aggregate(self, by, fields, stats):
+        """Computes the statistics of aggregate() for the query.
+
+        The count, min, max and avg are computed by one GROUP BY query.
+        SQL has no portable percentile, so for each field with percentiles
+        its values alone are read, sorted by the database.
+        """
+        group, join = self.__group(by)
+        aggregates = {'min': func.min, 'max': func.max, 'avg': func.avg}
+        sql = [(name, stat) for name in fields for stat in stats
+               if stat in aggregates]
+        query = self._source.query(group, func.count(), *(
+            aggregates[stat](getattr(self._cls, name))
+            for name, stat in sql)).select_from(self._cls)
+        if join is not None:
+            query = query.outerjoin(*join)
+        results = {}
+        for row in self.__where(query).group_by(group):
+            results[row[0]] = {'count': row[1]}
+            for name in fields:
+                results[row[0]][name] = dict.fromkeys(stats)
+            for (name, stat), value in zip(sql, row[2:]):
+                results[row[0]][name][stat] = (None if value is None
+                                               else float(value))
+        for name in fields:
+            column = getattr(self._cls, name)
+            values = {}
+            if any(stat not in aggregates for stat in stats):
+                query = self._source.query(group, column).select_from(
+                    self._cls)
+                if join is not None:
+                    query = query.outerjoin(*join)
+                query = self.__where(query).filter(column.isnot(None))
+                for key, value in query.order_by(group, column):
+                    values.setdefault(key, array('d')).append(value)
+            for stat in stats:
+                if stat not in aggregates:
+                    for key in results:
+                        results[key][name][stat] = percentile(
+                            values.get(key, ()), int(stat[1:]) / 100)
+        return results
+
+    def __group(self, by):
+        """Returns the column grouped by and the join it needs, or None.
+
+        A field of groupings is read from the table its foreign key
+        references.
+        """
+        if (self._cls.__name__, by) not in groupings:
+            return getattr(self._cls, by), None
+        key, cls, field = groupings[(self._cls.__name__, by)]
+        column = getattr(self._cls, key)
+        target = next(iter(column.property.columns[0].foreign_keys)).column
+        return target.table.c[field], (target.table, column == target)
+
+    def __where(self, query):
+        """Returns query restricted by the criteria and seek position."""
+        for name, comparison, value in self._criteria:
+            column = getattr(self._cls, name)
+            if comparison == 'in':
+                query = query.filter(column.in_(value))
+            else:
+                query = query.filter(comparisons[comparison](column, value))
+        if self._seek:
+            query = query.filter(self.__seek())
+        return query
+
+    def __seek(self):
+        """Returns the condition of the rows after the seek position.
+
+        ``(a, b) > (x, y)`` is written ``a >= x AND (a > x OR (a = x AND
+        b > y))``: the redundant ``a >= x`` lets the database start an
+        index on ``(a, b)`` at x instead of scanning it from the start.
+        """
+        fields, values, desc = self._seek
+        columns = [getattr(self._cls, name) for name in fields]
+        test = operator.lt if desc else operator.gt
+        bound = operator.le if desc else operator.ge
+        return and_(bound(columns[0], values[0]),
+                    or_(*(and_(*[columns[j] == values[j] for j in range(i)],
+                               test(columns[i], values[i]))
+                          for i in range(len(columns)))))
+
+    def __option(self, path):
+        """Returns the loader option of a profile path."""
+        option = None
+        owner = self._cls
+        for name, loader in path:
+            attribute = getattr(owner, name)
+            if option is None:
+                option = loader(attribute)
+            else:
+                option = getattr(option, loader.__name__)(attribute)
+            owner = attribute.property.mapper.class_
+        return option
@@ -2,7 +2,8 @@
 """Module defining the Place class for the AirBnB clone project."""
 import models
 from models.base_model import BaseModel, Base
-from sqlalchemy import Column, String, ForeignKey, Integer, Float, Table
+from sqlalchemy import (Column, String, ForeignKey, Integer, Float, Index,
+                        Table)
 from os import getenv
 from sqlalchemy.orm import relationship
 from models.review import Review
@@ -45,8 +46,8 @@ class Place(BaseModel, Base):
         price_by_night (int): The price per night for staying at the place.
         latitude (float): The latitude coordinate of the place.
         longitude (float): The longitude coordinate of the place.
-        amenity_ids (list): A list of IDs of amenities associated with
-                            the place.
+        amenity_ids (set): The IDs of the amenities associated with
+                           the place.
 
     Relationships:
         - reviews: One-to-many relationship with the Review class,
@@ -55,6 +56,8 @@ class Place(BaseModel, Base):
                      the place_amenity association table.
     """
     __tablename__ = 'places'
+    # The default order of page(), so that a page is one index range scan.
+    __table_args__ = (Index('ix_places_name_id', 'name', 'id'),)
     city_id = Column(String(60), ForeignKey("cities.id"), nullable=False)
     user_id = Column(String(60), ForeignKey("users.id"), nullable=False)
     name = Column(String(128), nullable=False)
@@ -65,77 +68,97 @@ class Place(BaseModel, Base):
     price_by_night = Column(Integer, nullable=False, default=0)
     latitude = Column(Float, nullable=True)
     longitude = Column(Float, nullable=True)
-    amenity_ids = []
-    reviews = relationship('Review', backref='place', cascade='all, delete-orphan')
-    amenities = relationship(
-        'Amenity',
-        secondary='place_amenity',
-        viewonly=False,
-        back_populates="place_amenities"
-    )
-
-if getenv("HBNB_TYPE_STORAGE") == "FileStorage":
-    @property
-    def reviews(self):
-        """Getter attribute that returns a list of Review instances associated
-            with the current Place.
-
-        Returns:
-            list: A list of Review instances linked to the current Place.
 
-        Example:
-            To retrieve the reviews associated with a Place instance
-            named 'my_place':
+    def __init__(self, *args, **kwargs):
+        """Instantiates a new place.
 
-            ```python
-            reviews_list = my_place.review
-            ```
+        amenity_ids is a set owned by the instance; a list read back from
+        storage is turned into a set.
         """
-        my_list = []
-        # Retrieve City objects (or instances) in storage.
-        my_obj = models.storage.all(Review)
-
-        # Filter Review instances that have place_id equal to the
-        # current Place's id.
-        for obj in my_obj.values():
-            if obj.place_id == self.id:
-                my_list.append(obj)
-
-        return (my_list)
+        super().__init__(*args, **kwargs)
+        self.amenity_ids = set(self.__dict__.get('amenity_ids', ()))
 
-    @property
-    def amenities(self):
-        """Getter attribute that returns a list of Amenity instances associated
-               with the current Place.
+    def to_dict(self):
+        """Convert instance into dict format
 
-        Returns:
-            list: A list of Amenity instances linked to the current Place.
-
-        Example:
-            To retrieve the amenities associated with a Place instance
-            named 'my_place':
-
-            ```python
-            amenities_list = my_place.amenities
-            ```
-        """
-        my_list = []
-        my_obj = models.storage.all(Amenity)
-        for obj in my_obj.values():
-            if obj.id in self.amenity_ids:
-                my_list.append(obj)
-
-        return (my_list)
-
-    @amenities.setter
-    def amenities(self, value):
-        """Setter attribute that assigns a new Amenity instance to
-           the current Place.
-        Args:
-            value (Amenity): The Amenity instance to be associated
-            with the current Place.
+        amenity_ids is stored as a sorted list, JSON having no sets.
         """
-        if type(value) == Amenity:
-            self.amenity_ids.append(value.id)
-
-
+        dictionary = super().to_dict()
+        if 'amenity_ids' in dictionary:
+            dictionary['amenity_ids'] = sorted(dictionary['amenity_ids'])
+        return dictionary
+
+    if getenv("HBNB_TYPE_STORAGE") == "db":
+        reviews = relationship('Review', backref='place',
+                               cascade='all, delete-orphan')
+        amenities = relationship(
+            'Amenity',
+            secondary='place_amenity',
+            viewonly=False,
+            back_populates="place_amenities"
+        )
+    else:
+        @property
+        def user(self):
+            """Getter attribute that returns the User owning the current
+               Place, or None.
+            """
+            return models.storage.get('User', self.__dict__.get('user_id'))
+
+        @property
+        def reviews(self):
+            """Getter attribute that returns a list of Review instances
+               associated with the current Place.
+
+            Returns:
+                list: A list of Review instances linked to the current Place.
+
+            Example:
+                To retrieve the reviews associated with a Place instance
+                named 'my_place':
+
+                ```python
+                reviews_list = my_place.reviews
+                ```
+            """
+            # Retrieve the Review instances whose place_id is the current
+            # Place's id from the storage's foreign key index.
+            return list(models.storage.related(Review, 'place_id',
+                                               self.id).values())
+
+        @property
+        def amenities(self):
+            """Getter attribute that returns a list of Amenity instances
+               associated with the current Place.
+
+            Returns:
+                list: A list of Amenity instances linked to the current Place.
+
+            Example:
+                To retrieve the amenities associated with a Place instance
+                named 'my_place':
+
+                ```python
+                amenities_list = my_place.amenities
+                ```
+            """
+            my_list = []
+            for amenity_id in self.amenity_ids:
+                obj = models.storage.get(Amenity, amenity_id)
+                if obj is not None:
+                    my_list.append(obj)
+
+            return my_list
+
+        @amenities.setter
+        def amenities(self, value):
+            """Setter attribute that assigns a new Amenity instance to
+               the current Place.
+            Args:
+                value (Amenity): The Amenity instance to be associated
+                with the current Place.
+            """
+            if type(value) == Amenity:
+                self.amenity_ids.add(value.id)
+                # The set changed in place, flag the instance for storage.
+                self._dirty = True
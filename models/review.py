@@ -1,7 +1,9 @@
 #!/usr/bin/python3
 """ Review module for the HBNB project """
+import models
 from models.base_model import BaseModel, Base
 from sqlalchemy import Column, String, ForeignKey
+from os import getenv
 
 
 class Review(BaseModel, Base):
@@ -10,3 +12,11 @@ class Review(BaseModel, Base):
     place_id = Column(String(60), ForeignKey('places.id'), nullable=False)
     user_id = Column(String(60), ForeignKey('users.id'), nullable=False)
     text = Column(String(1024), nullable=False)
+
+    if getenv("HBNB_TYPE_STORAGE") != "db":
+        @property
+        def user(self):
+            """Getter attribute that returns the User who wrote the current
+               Review, or None.
+            """
+            return models.storage.get('User', self.__dict__.get('user_id'))
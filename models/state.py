@@ -2,7 +2,7 @@
 """ State Module for HBNB project """
 import models
 from models.base_model import BaseModel, Base
-from sqlalchemy import Column, String
+from sqlalchemy import Column, Index, String
 from sqlalchemy.orm import relationship
 from os import getenv
 from models.city import City
@@ -11,6 +11,8 @@ from models.city import City
 class State(BaseModel, Base):
     """ State class """
     __tablename__ = 'states'
+    # The default order of page(), so that a page is one index range scan.
+    __table_args__ = (Index('ix_states_name_id', 'name', 'id'),)
     name = Column(String(128), nullable=False)
 
     if getenv("HBNB_TYPE_STORAGE") == "db":
@@ -33,14 +35,7 @@ class State(BaseModel, Base):
                 cities_list = my_state.cities
                 ```
             """
-            my_list = []
-            # Retrieve City objects (or instances) in storage.
-            my_obj = models.storage.all(City)
-
-            # Filter City instances that have state_id equal to the
-            # current State's id.
-            for obj in my_obj.values():
-                if obj.state_id == self.id:
-                    my_list.append(obj)
-
-            return my_list
+            # Retrieve the City instances whose state_id is the current
+            # State's id from the storage's foreign key index.
+            return list(models.storage.related(City, 'state_id',
+                                               self.id).values())
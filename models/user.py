@@ -1,8 +1,10 @@
 #!/usr/bin/python3
 """This module defines a class User"""
+import models
 from models.base_model import BaseModel, Base
 from sqlalchemy import Column, String
 from sqlalchemy.orm import relationship
+from os import getenv
 
 
 class User(BaseModel, Base):
@@ -12,5 +14,31 @@ class User(BaseModel, Base):
     password = Column(String(128), nullable=False)
     first_name = Column(String(128))
     last_name = Column(String(128))
-    places = relationship('Place', backref='user', cascade='all, delete-orphan')
-    reviews = relationship('Review', backref='user', cascade='all, delete-orphan')
+
+    if getenv("HBNB_TYPE_STORAGE") == "db":
+        places = relationship('Place', backref='user',
+                              cascade='all, delete-orphan')
+        reviews = relationship('Review', backref='user',
+                               cascade='all, delete-orphan')
+    else:
+        @property
+        def places(self):
+            """Getter attribute that returns the list of Place instances
+               owned by the current User.
+
+            Returns:
+                list: A list of Place instances linked to the current User.
+            """
+            return list(models.storage.related('Place', 'user_id',
+                                               self.id).values())
+
+        @property
+        def reviews(self):
+            """Getter attribute that returns the list of Review instances
+               written by the current User.
+
+            Returns:
+                list: A list of Review instances linked to the current User.
+            """
+            return list(models.storage.related('Review', 'user_id',
+                                               self.id).values())
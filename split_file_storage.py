@@ -0,0 +1,24 @@
+#!/usr/bin/python3
+"""
+Converts a FileStorage file into the sharded layout.
+
+Each class of the storage file is written to its own ``<class>.json`` file
+in the target directory, which can then be used by setting
+HBNB_FILE_STORAGE_DIR to that directory.
+
+Usage:
+    ./split_file_storage.py [storage file] <directory>
+
+    The storage file defaults to file.json.
+"""
+import sys
+from models.engine.file_storage import split_file
+
+
+if __name__ == "__main__":
+    if len(sys.argv) not in (2, 3):
+        print("Usage: {} [storage file] <directory>".format(sys.argv[0]))
+        sys.exit(1)
+    path = sys.argv[1] if len(sys.argv) == 3 else 'file.json'
+    for name in split_file(path, sys.argv[-1]):
+        print(name)
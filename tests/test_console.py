@@ -0,0 +1,40 @@
+#!/usr/bin/python3
+""" Module for testing the console"""
+import unittest
+from io import StringIO
+from os import getenv
+from unittest.mock import patch
+from console import HBNBCommand
+
+
+class test_console(unittest.TestCase):
+    """ Class to test the console commands """
+
+    def run_command(self, line):
+        """ Returns what the console prints for a command """
+        with patch('sys.stdout', new=StringIO()) as out:
+            HBNBCommand().onecmd(line)
+        return out.getvalue().strip()
+
+    def test_destroy_missing(self):
+        """ Destroying an unknown id reports it """
+        self.assertEqual(self.run_command('destroy BaseModel missing-id'),
+                         "** no instance found **")
+        self.assertEqual(self.run_command('destroy State missing-id'),
+                         "** no instance found **")
+
+    def test_update_missing(self):
+        """ Updating an unknown id reports it """
+        self.assertEqual(
+            self.run_command('update BaseModel missing-id name "x"'),
+            "** no instance found **")
+
+    def test_count(self):
+        """ Count prints a number for every class """
+        for name in HBNBCommand.classes:
+            self.assertTrue(self.run_command('count ' + name).isdigit())
+
+    @unittest.skipIf(getenv('HBNB_TYPE_STORAGE') != 'db', "DBStorage only")
+    def test_count_unmapped(self):
+        """ BaseModel has no table, so none are counted """
+        self.assertEqual(self.run_command('count BaseModel'), "0")
@@ -62,6 +62,14 @@ class test_basemodel(unittest.TestCase):
         self.assertEqual(str(i), '[{}] ({}) {}'.format(self.name, i.id,
                          i.__dict__))
 
+    def test_str_dirty(self):
+        """ The dirty flag of the storage is not shown """
+        i = self.value()
+        i.name = "Changed"
+        self.assertTrue(i._dirty)
+        self.assertNotIn('_dirty', str(i))
+        self.assertNotIn('_dirty', i.__dict__)
+
     def test_todict(self):
         """ """
         i = self.value()
@@ -0,0 +1,10 @@
+#!/usr/bin/python3
+""" Helpers shared by the storage engine tests"""
+from models.engine.file_storage import FileStorage
+
+
+def reset_file_storage():
+    """ Empties the objects and caches shared by every FileStorage """
+    for name in ('objects', 'by_class', 'refs', 'ref_keys', 'pending',
+                 'encoded', 'raw', 'shards', 'stamps'):
+        getattr(FileStorage, '_FileStorage__' + name).clear()
@@ -0,0 +1,110 @@
+#!/usr/bin/python3
+""" Module for testing the async storage"""
+import importlib.util
+import os
+import tempfile
+import threading
+import unittest
+from os import getenv
+from unittest import mock
+from models import storage
+from models.base_model import BaseModel
+from models.city import City
+from models.state import State
+from models.engine.async_storage import (AsyncDBStorage, AsyncFileStorage,
+                                         AsyncQuery)
+from models.engine.file_storage import FileStorage
+from tests.test_models.test_engine import reset_file_storage
+
+
+@unittest.skipIf(getenv('HBNB_TYPE_STORAGE') == 'db', "FileStorage only")
+class test_asyncFileStorage(unittest.IsolatedAsyncioTestCase):
+    """ Class to test the async file storage """
+
+    async def asyncSetUp(self):
+        """ Stores two states and a city """
+        reset_file_storage()
+        self.storage = AsyncFileStorage(storage)
+        self.state = State(name="California")
+        self.city = City(name="Fresno", state_id=self.state.id)
+        for obj in (self.state, State(name="Arizona"), self.city):
+            await self.storage.new(obj)
+
+    def tearDown(self):
+        """ Empties the storage and removes its file """
+        reset_file_storage()
+        try:
+            os.remove('file.json')
+        except FileNotFoundError:
+            pass
+
+    async def test_read(self):
+        """ Objects are read through awaited calls """
+        self.assertEqual(len(await self.storage.all(State)), 2)
+        self.assertEqual(await self.storage.count(), 3)
+        self.assertIs(await self.storage.get('State', self.state.id),
+                      self.state)
+
+    async def test_query(self):
+        """ Query results are awaited """
+        query = self.storage.query(State).order_by('name')
+        self.assertIsInstance(query, AsyncQuery)
+        self.assertEqual([state.name for state in await query.all()],
+                         ["Arizona", "California"])
+        self.assertEqual((await query.first()).name, "Arizona")
+        self.assertEqual(len(await query.page(1)), 1)
+        self.assertEqual([state.name async for state in
+                          query.filter(name="California")], ["California"])
+        stats = await self.storage.query(City).aggregate('state_id')
+        self.assertEqual(stats, {self.state.id: {'count': 1}})
+        with self.assertRaises(TypeError):
+            list(query)
+
+    async def test_save_delete(self):
+        """ Saving and deleting run in the executor """
+        await self.storage.save()
+        self.assertTrue(os.path.exists('file.json'))
+        await self.storage.delete(self.city)
+        await self.storage.save()
+        self.assertIsNone(await self.storage.get(City, self.city.id))
+
+    async def test_new_executor(self):
+        """ Objects are added in the executor, not on the event loop """
+        threads = []
+        with mock.patch.object(FileStorage, 'new', side_effect=lambda obj:
+                               threads.append(threading.current_thread())):
+            await self.storage.new(State(name="Texas"))
+        self.assertEqual(len(threads), 1)
+        self.assertIsNot(threads[0], threading.current_thread())
+
+
+@unittest.skipUnless(importlib.util.find_spec('aiosqlite'),
+                     "aiosqlite is not installed")
+class test_asyncDBStorage(unittest.IsolatedAsyncioTestCase):
+    """ Class to test the async database storage over SQLite """
+
+    async def asyncSetUp(self):
+        """ Creates the tables in a new SQLite file """
+        self.tmp = tempfile.TemporaryDirectory()
+        url = 'sqlite:///' + os.path.join(self.tmp.name, 'hbnb.db')
+        with mock.patch.dict(os.environ, {'HBNB_DB_URL': url}):
+            self.storage = AsyncDBStorage()
+        await self.storage.reload()
+
+    async def asyncTearDown(self):
+        """ Removes the database """
+        await self.storage._AsyncDBStorage__engine.dispose()
+        self.tmp.cleanup()
+
+    async def test_unmapped(self):
+        """ Classes without a table are read as empty """
+        state = State(name="California")
+        await self.storage.new(state)
+        await self.storage.save()
+        self.assertEqual(await self.storage.count('State'), 1)
+        self.assertIsNone(await self.storage.get('Nope', state.id))
+        self.assertEqual(await self.storage.count(BaseModel), 0)
+        self.assertEqual(await self.storage.all('Nope'), {})
+        with self.assertRaises(ValueError):
+            self.storage.query('Nope')
+        await self.storage.close()
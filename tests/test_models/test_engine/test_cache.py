@@ -0,0 +1,91 @@
+#!/usr/bin/python3
+""" Module for testing the query cache"""
+import unittest
+from unittest import mock
+from models.engine.cache import QueryCache
+
+
+class test_queryCache(unittest.TestCase):
+    """ Class to test the query cache """
+
+    def setUp(self):
+        """ Creates a cache of two results """
+        self.cache = QueryCache(max_size=2)
+        self.loads = []
+
+    def load(self, result):
+        """ Returns a loader recording its calls """
+        def run():
+            """ Runs the query """
+            self.loads.append(result)
+            return [result]
+        return run
+
+    def test_hit(self):
+        """ A result is only loaded once """
+        self.assertEqual(self.cache.get('a', ['State'], self.load(1)), [1])
+        self.assertEqual(self.cache.get('a', ['State'], self.load(2)), [1])
+        self.assertEqual(self.loads, [1])
+        self.assertEqual(self.cache.stats(),
+                         {'hits': 1, 'misses': 1, 'evictions': 0,
+                          'invalidations': 0, 'size': 1})
+
+    def test_copy(self):
+        """ Changing a returned list does not change the cache """
+        self.cache.get('a', ['State'], self.load(1)).append(2)
+        self.assertEqual(self.cache.get('a', ['State'], self.load(1)), [1])
+
+    def test_lru(self):
+        """ The least recently used result is evicted """
+        self.cache.get('a', ['State'], self.load(1))
+        self.cache.get('b', ['State'], self.load(2))
+        self.cache.get('a', ['State'], self.load(1))
+        self.cache.get('c', ['State'], self.load(3))
+        self.cache.get('b', ['State'], self.load(2))
+        self.assertEqual(self.loads, [1, 2, 3, 2])
+        self.assertEqual(self.cache.evictions, 2)
+
+    def test_ttl(self):
+        """ An expired result is loaded again """
+        cache = QueryCache(ttl=10)
+        with mock.patch('models.engine.cache.monotonic', return_value=0):
+            cache.get('a', ['State'], self.load(1))
+        with mock.patch('models.engine.cache.monotonic', return_value=5):
+            cache.get('a', ['State'], self.load(1))
+        with mock.patch('models.engine.cache.monotonic', return_value=11):
+            cache.get('a', ['State'], self.load(1))
+        self.assertEqual(self.loads, [1, 1])
+
+    def test_invalidate(self):
+        """ Only the results read from a changed class are dropped """
+        self.cache.get('a', ['State', 'City'], self.load(1))
+        self.cache.get('b', ['Amenity'], self.load(2))
+        self.cache.invalidate('City')
+        self.cache.get('a', ['State', 'City'], self.load(1))
+        self.cache.get('b', ['Amenity'], self.load(2))
+        self.assertEqual(self.loads, [1, 2, 1])
+        self.assertEqual(self.cache.invalidations, 1)
+
+    def test_invalidate_while_loading(self):
+        """ A result read while its class is invalidated is not cached """
+        def load():
+            """ Runs the query while another thread changes a State """
+            self.cache.invalidate('State')
+            return self.load(1)()
+
+        self.assertEqual(self.cache.get('a', ['State', 'City'], load), [1])
+        self.assertEqual(self.cache.get('a', ['State', 'City'],
+                                        self.load(2)), [2])
+        self.assertEqual(self.cache.get('a', ['State', 'City'],
+                                        self.load(3)), [2])
+        self.assertEqual(self.loads, [1, 2])
+
+    def test_clear_while_loading(self):
+        """ A result read while the cache is cleared is not cached """
+        def load():
+            """ Runs the query while the cache is cleared """
+            self.cache.clear()
+            return self.load(1)()
+
+        self.cache.get('a', ['State'], load)
+        self.assertEqual(self.cache.stats()['size'], 0)
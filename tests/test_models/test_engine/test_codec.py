@@ -0,0 +1,123 @@
+#!/usr/bin/python3
+""" Module for testing the storage codecs"""
+import unittest
+from models.engine.codec import codecs, iter_json_items
+from models.place import Place
+from models.state import State
+import io
+import json
+
+
+class test_codec(unittest.TestCase):
+    """ Class to test the JSON and binary codecs """
+
+    def records(self):
+        """ Returns the (key, record) pairs used in the tests """
+        place = Place(name="Loft", number_rooms=2, latitude=-12.5,
+                      city_id="not-a-uuid")
+        place.amenity_ids = ["b6a6e15c-c67d-4312-9a75-9d084935e579"]
+        place.description = None
+        place.extra = {"stairs": True, "notes": "café ☕"}
+        state = State(name="Cal\"ifornia")
+        records = [('Place.' + place.id, place.to_dict()),
+                   ('State.' + state.id, state.to_dict()),
+                   ('State.legacy', {'id': 'x', 'created_at': 'yesterday',
+                                     'number': -(1 << 70)})]
+        return records
+
+    def write(self, codec, records):
+        """ Returns the storage file of the records """
+        f = io.BytesIO() if codec.binary else io.StringIO()
+        codec.write(f, [codec.encode(key, rec) for key, rec in records])
+        f.seek(0)
+        return f
+
+    def test_round_trip(self):
+        """ Both codecs read back the records they wrote """
+        records = self.records()
+        for codec in codecs.values():
+            items = list(codec.iter_items(self.write(codec, records)))
+            self.assertEqual(items, records)
+
+    def test_round_trip_raw(self):
+        """ Raw members decode and encode to the same records """
+        records = self.records()
+        for codec in codecs.values():
+            f = self.write(codec, records)
+            raw = list(codec.iter_items(f, raw=True))
+            self.assertEqual([(key, codec.decode(val)) for key, val in raw],
+                             records)
+            f = io.BytesIO() if codec.binary else io.StringIO()
+            codec.write(f, [codec.member(key, val) for key, val in raw])
+            f.seek(0)
+            self.assertEqual(list(codec.iter_items(f)), records)
+
+    def test_binary_matches_json(self):
+        """ The binary file decodes to what the JSON file holds """
+        records = self.records()
+        json_file = self.write(codecs['json'], records)
+        binary_file = self.write(codecs['binary'], records)
+        self.assertEqual(dict(codecs['binary'].iter_items(binary_file)),
+                         json.load(json_file))
+
+    def test_binary_smaller(self):
+        """ The binary file is smaller than the JSON file """
+        records = self.records() * 20
+        json_size = len(self.write(codecs['json'], records).getvalue())
+        binary_size = len(self.write(codecs['binary'], records).getvalue())
+        self.assertLess(binary_size, json_size * 0.7)
+
+    def test_binary_invalid(self):
+        """ Invalid or truncated binary files raise ValueError """
+        data = self.write(codecs['binary'], self.records()).getvalue()
+        for bad in (b'', b'{}', data[:-3]):
+            with self.assertRaises(ValueError):
+                list(codecs['binary'].iter_items(io.BytesIO(bad)))
+
+    def test_binary_blocks(self):
+        """ Records spanning the read blocks are streamed whole """
+        records = self.records() * 2000
+        records.append(('State.long', {'id': 'long', 'name': 'x' * 100000}))
+        data = self.write(codecs['binary'], records).getvalue()
+        self.assertGreater(len(data), 3 << 16)
+        self.assertEqual(list(codecs['binary'].iter_items(io.BytesIO(data))),
+                         records)
+        for end in (len(data) - 50000, 70000, 65537):
+            with self.assertRaises(ValueError):
+                list(codecs['binary'].iter_items(io.BytesIO(data[:end])))
+
+    def test_binary_varint_time(self):
+        """ Timestamps written as varints by older files are read """
+        codec = codecs['binary']
+        pack_varint = codec._BinaryCodec__pack_varint
+        payload = bytearray([1, codec.STR, 7]) + b'State.x'
+        payload.append(codec.TIME)
+        pack_varint(payload, 1600000000123456 * 2)
+        data = bytearray(codec.magic)
+        data += b'\x00\x05State\x01\x0acreated_at\x01'
+        pack_varint(data, len(payload))
+        data += payload
+        self.assertEqual(list(codec.iter_items(io.BytesIO(bytes(data)))),
+                         [('State.x', {'created_at':
+                                       '2020-09-13T12:26:40.123456',
+                                       '__class__': 'State'})])
+
+    def test_iter_json_items(self):
+        """ Members are streamed whatever the chunk size """
+        doc = {"a": {"b": [1, 2.5, "x}"]}, "c\"": 1500.0, "d": None}
+        for text in (json.dumps(doc), json.dumps(doc, indent=4)):
+            for size in (1, 3, 4096):
+                items = iter_json_items(io.StringIO(text), size)
+                self.assertEqual(list(items), list(doc.items()))
+                items = iter_json_items(io.StringIO(text), size, raw=True)
+                self.assertEqual([(k, json.loads(v)) for k, v in items],
+                                 list(doc.items()))
+                items = iter_json_items(io.StringIO(text), size, spans=True)
+                self.assertEqual([(k, json.loads(text[v[0]:v[1]]))
+                                  for k, v in items], list(doc.items()))
+
+    def test_iter_json_items_invalid(self):
+        """ Anything but a JSON object raises ValueError """
+        for text in ('', '[]', '{"a": 1', '{"a": 1,}', '{1: 2}', '{} {}'):
+            with self.assertRaises(ValueError):
+                list(iter_json_items(io.StringIO(text), 2))
@@ -0,0 +1,341 @@
+#!/usr/bin/python3
+""" Module for testing db storage"""
+import importlib
+import os
+import tempfile
+import threading
+import unittest
+from os import getenv
+from unittest import mock
+from sqlalchemy import create_engine, event, inspect, text
+from sqlalchemy.exc import IntegrityError
+from models import storage
+from models.amenity import Amenity
+from models.base_model import BaseModel
+from models.city import City
+from models.engine.cache import QueryCache
+from models.engine.db_storage import DBStorage, ensure_schema, schema
+from models.place import Place
+from models.review import Review
+from models.state import State
+from models.user import User
+
+
+@unittest.skipIf(getenv('HBNB_TYPE_STORAGE') != 'db', "DBStorage only")
+class test_loadingProfiles(unittest.TestCase):
+    """ Class to test the SQL statements of the web pages """
+
+    def setUp(self):
+        """ Stores three states, six cities and two places """
+        self.objs = []
+        user = self.add(User(email="a@b.c", password="pwd",
+                             first_name="Ann", last_name="Lee"))
+        amenity = self.add(Amenity(name="Wifi"))
+        for i in range(3):
+            state = self.add(State(name="State {}".format(i)))
+            for j in range(2):
+                city = self.add(City(name="City {}".format(j),
+                                     state_id=state.id))
+        for i in range(2):
+            place = self.add(Place(name="Place {}".format(i),
+                                   city_id=city.id, user_id=user.id))
+            place.amenities.append(amenity)
+            self.add(Review(text="Nice", place_id=place.id,
+                            user_id=user.id))
+        storage.save()
+        storage.close()
+        self.statements = []
+        self.listener = self.record
+        event.listen(storage._DBStorage__engine, 'before_cursor_execute',
+                     self.listener)
+
+    def tearDown(self):
+        """ Deletes the stored objects """
+        event.remove(storage._DBStorage__engine, 'before_cursor_execute',
+                     self.listener)
+        for obj in reversed(self.objs):
+            storage.delete(storage.get(type(obj), obj.id))
+        storage.save()
+        storage.close()
+
+    def add(self, obj):
+        """ Adds obj to storage and remembers it """
+        storage.new(obj)
+        self.objs.append(obj)
+        return obj
+
+    def record(self, conn, cursor, statement, *args):
+        """ Records the SELECT statements sent to the database """
+        if statement.lstrip().upper().startswith('SELECT'):
+            self.statements.append(statement)
+
+    def render(self, module, url):
+        """ Renders a page and returns its number of SELECT statements """
+        app = importlib.import_module('web_flask.' + module).app
+        response = app.test_client().get(url)
+        self.assertEqual(response.status_code, 200)
+        return len(self.statements)
+
+    def test_cities_by_states(self):
+        """ States and their cities are read in two statements """
+        self.assertEqual(self.render('8-cities_by_states',
+                                     '/cities_by_states'), 2)
+
+    def test_hbnb(self):
+        """ The page does not issue one statement per state or place """
+        # states, cities, amenities, places joined with their owner,
+        # place amenities and reviews joined with their author
+        self.assertEqual(self.render('100-hbnb', '/hbnb'), 6)
+
+
+@unittest.skipIf(getenv('HBNB_TYPE_STORAGE') != 'db', "DBStorage only")
+class test_sessions(unittest.TestCase):
+    """ Class to test the session of each thread """
+
+    def test_thread_sessions(self):
+        """ Each thread uses its own session """
+        registry = storage._DBStorage__session
+        sessions = []
+
+        def run():
+            """ Records the session of the thread, then closes it """
+            storage.count(State)
+            sessions.append(registry())
+            storage.close()
+
+        threads = [threading.Thread(target=run) for i in range(2)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(len(sessions), 2)
+        self.assertIsNot(sessions[0], sessions[1])
+        self.assertNotIn(registry(), sessions)
+
+    def test_close_removes(self):
+        """ close() removes the session of the thread from the registry """
+        registry = storage._DBStorage__session
+        session = registry()
+        storage.close()
+        self.assertFalse(registry.registry.has())
+        self.assertIsNot(registry(), session)
+
+
+@unittest.skipIf(getenv('HBNB_TYPE_STORAGE') != 'db', "DBStorage only")
+class test_newMany(unittest.TestCase):
+    """ Class to test bulk inserts """
+
+    def tearDown(self):
+        """ Deletes the inserted states """
+        for state in storage.all(State).values():
+            storage.delete(state)
+        storage.save()
+        storage.close()
+
+    def test_batches(self):
+        """ Each batch is one INSERT, and the rows are committed once """
+        statements = []
+
+        def record(conn, cursor, statement, *args):
+            """ Records the statements sent to the database """
+            statements.append(statement.lstrip().split()[0].upper())
+
+        objs = [State(name="State {}".format(i)) for i in range(5)]
+        objs += [State(name="State {}".format(i)).to_dict()
+                 for i in range(5, 25)]
+        event.listen(storage._DBStorage__engine, 'before_cursor_execute',
+                     record)
+        try:
+            self.assertEqual(storage.new_many(objs, batch_size=10), 25)
+        finally:
+            event.remove(storage._DBStorage__engine,
+                         'before_cursor_execute', record)
+        self.assertEqual(statements.count('INSERT'), 3)
+        storage.close()
+        self.assertEqual(storage.count(State), 25)
+
+    def test_duplicate(self):
+        """ A failed insert is rolled back and the session stays usable """
+        state = State(name="State").to_dict()
+        storage.new_many([state])
+        with self.assertRaises(IntegrityError):
+            storage.new_many([State(name="Other").to_dict(), state],
+                             batch_size=1)
+        self.assertEqual(storage.count(State), 1)
+        storage.new_many([State(name="Other")])
+        self.assertEqual(storage.count(State), 2)
+
+    def test_version(self):
+        """ The version grows with each bulk insert """
+        version = storage.version()
+        storage.new_many([State(name="State")])
+        self.assertGreater(storage.version(), version)
+
+
+@unittest.skipIf(getenv('HBNB_TYPE_STORAGE') != 'db', "DBStorage only")
+class test_queryCache(unittest.TestCase):
+    """ Class to test the query cache of DBStorage """
+
+    def setUp(self):
+        """ Turns the cache on """
+        storage._DBStorage__cache = QueryCache()
+
+    def tearDown(self):
+        """ Turns the cache off and deletes the stored objects """
+        del storage._DBStorage__cache
+        for cls in (City, State):
+            for obj in storage.all(cls).values():
+                storage.delete(obj)
+        storage.save()
+        storage.close()
+
+    def test_invalidate(self):
+        """ Writes drop the results read from the changed classes """
+        state = State(name="California")
+        storage.new(state)
+        storage.save()
+        self.assertEqual(len(storage.all(State)), 1)
+        self.assertEqual(len(storage.all(State)), 1)
+        self.assertEqual(storage.cache_stats()['hits'], 1)
+        storage.new(City(name="Fresno", state_id=state.id))
+        storage.save()
+        self.assertEqual(len(storage.all(State)), 1)
+        self.assertEqual(storage.cache_stats()['hits'], 2)
+        self.assertEqual(len(storage.query(State).load('cities').all()[0]
+                             .cities), 1)
+        storage.new(City(name="Napa", state_id=state.id))
+        storage.save()
+        storage.close()
+        self.assertEqual(len(storage.query(State).load('cities').all()[0]
+                             .cities), 2)
+        storage.delete(storage.get(State, state.id))
+        storage.save()
+        self.assertEqual(storage.all(State), {})
+
+
+@unittest.skipIf(getenv('HBNB_TYPE_STORAGE') != 'db', "DBStorage only")
+class test_unmapped(unittest.TestCase):
+    """ Class to test classes without a table """
+
+    def test_query(self):
+        """ Querying a class without a table raises ValueError """
+        with self.assertRaises(ValueError):
+            storage.query('Nope')
+        with self.assertRaises(ValueError):
+            storage.query(BaseModel)
+
+    def test_get_count(self):
+        """ get and count ignore classes without a table """
+        self.assertIsNone(storage.get('Nope', 'id'))
+        self.assertEqual(storage.count(BaseModel), 0)
+
+
+class test_schema(unittest.TestCase):
+    """ Class to test the schema fingerprint """
+
+    def setUp(self):
+        """ Creates an empty in-memory SQLite database """
+        self.engine = create_engine('sqlite://')
+
+    def tearDown(self):
+        """ Disposes of the database """
+        self.engine.dispose()
+
+    def test_create(self):
+        """ The tables are created on an empty database """
+        self.assertTrue(ensure_schema(self.engine))
+        self.assertIn('states', inspect(self.engine).get_table_names())
+
+    def test_up_to_date(self):
+        """ A matching fingerprint skips create_all """
+        ensure_schema(self.engine)
+        statements = []
+        event.listen(self.engine, 'before_cursor_execute',
+                     lambda conn, cursor, statement, *args:
+                     statements.append(statement))
+        self.assertFalse(ensure_schema(self.engine))
+        self.assertEqual(len(statements), 1)
+
+    def test_changed(self):
+        """ A different fingerprint runs create_all again """
+        ensure_schema(self.engine)
+        with self.engine.begin() as conn:
+            conn.execute(schema.update().values(fingerprint='old'))
+        self.assertTrue(ensure_schema(self.engine))
+        self.assertFalse(ensure_schema(self.engine))
+
+    def test_new_index(self):
+        """ An index added to an existing table is created """
+        ensure_schema(self.engine)
+        with self.engine.begin() as conn:
+            conn.execute(text('DROP INDEX ix_states_name_id'))
+            conn.execute(schema.update().values(fingerprint='old'))
+        self.assertTrue(ensure_schema(self.engine))
+        self.assertIn('ix_states_name_id',
+                      [index['name'] for index in
+                       inspect(self.engine).get_indexes('states')])
+
+    def test_concurrent(self):
+        """ Workers starting together on one database all succeed """
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        url = 'sqlite:///' + os.path.join(tmp.name, 'hbnb.db')
+        engines = [create_engine(url) for _ in range(2)]
+        barrier = threading.Barrier(len(engines))
+        errors = []
+
+        def start(engine):
+            barrier.wait()
+            try:
+                ensure_schema(engine)
+            except Exception as e:
+                errors.append(e)
+
+        threads = [threading.Thread(target=start, args=(engine,))
+                   for engine in engines]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(errors, [])
+        with engines[0].connect() as conn:
+            self.assertEqual(len(conn.execute(schema.select()).all()), 1)
+        self.assertFalse(ensure_schema(engines[0]))
+        for engine in engines:
+            engine.dispose()
+
+
+class test_sqlite(unittest.TestCase):
+    """ Class to test DBStorage over an SQLite file """
+
+    def setUp(self):
+        """ Connects a DBStorage to a new SQLite file """
+        self.tmp = tempfile.TemporaryDirectory()
+        url = 'sqlite:///' + os.path.join(self.tmp.name, 'hbnb.db')
+        with mock.patch.dict(os.environ, {'HBNB_DB_URL': url}):
+            self.storage = DBStorage()
+        self.storage.reload()
+
+    def tearDown(self):
+        """ Removes the database """
+        self.storage.close()
+        self.storage._DBStorage__engine.dispose()
+        self.tmp.cleanup()
+
+    def test_pragmas(self):
+        """ Connections run in WAL mode with the tuned pragmas """
+        with self.storage._DBStorage__engine.connect() as conn:
+            pragmas = [conn.execute(text('PRAGMA ' + name)).scalar()
+                       for name in ('journal_mode', 'synchronous',
+                                    'cache_size', 'mmap_size')]
+        self.assertEqual(pragmas, ['wal', 1, -65536, 268435456])
+
+    def test_storage(self):
+        """ Objects are stored in the SQLite file """
+        state = State(name="California")
+        self.storage.new(state)
+        self.storage.save()
+        self.storage.close()
+        self.assertEqual(self.storage.count(State), 1)
+        self.assertEqual(self.storage.get(State, state.id).name,
+                         "California")
@@ -2,8 +2,15 @@
 """ Module for testing file storage"""
 import unittest
 from models.base_model import BaseModel
+from models.state import State
+from models.city import City
 from models import storage
+from models.engine.file_storage import FileStorage, split_file
+from tests.test_models.test_engine import reset_file_storage
+import json
 import os
+import shutil
+import time
 
 
 class test_fileStorage(unittest.TestCase):
@@ -11,18 +18,16 @@ class test_fileStorage(unittest.TestCase):
 
     def setUp(self):
         """ Set up test environment """
-        del_list = []
-        for key in storage._FileStorage__objects.keys():
-            del_list.append(key)
-        for key in del_list:
-            del storage._FileStorage__objects[key]
+        reset_file_storage()
 
     def tearDown(self):
         """ Remove storage file at end of tests """
-        try:
-            os.remove('file.json')
-        except:
-            pass
+        for path in ('file.json', 'file.json.journal', 'file.bin'):
+            try:
+                os.remove(path)
+            except:
+                pass
+        shutil.rmtree('shards', ignore_errors=True)
 
     def test_obj_list_empty(self):
         """ __objects is initially empty """
@@ -107,3 +112,494 @@ class test_fileStorage(unittest.TestCase):
         from models.engine.file_storage import FileStorage
         print(type(storage))
         self.assertEqual(type(storage), FileStorage)
+
+    def test_all_cls(self):
+        """ all(cls) only returns objects of that class """
+        state = State()
+        city = City()
+        storage.new(state)
+        storage.new(city)
+        self.assertEqual(storage.all(State), {'State.' + state.id: state})
+        self.assertEqual(storage.all(City), {'City.' + city.id: city})
+        self.assertEqual(storage.all('State'), storage.all(State))
+
+    def test_all_cls_empty(self):
+        """ all(cls) is empty for a class without objects """
+        storage.new(State())
+        self.assertEqual(storage.all(City), {})
+
+    def test_all_cls_delete(self):
+        """ Deleted objects leave the class index """
+        state = State()
+        storage.new(state)
+        storage.delete(state)
+        self.assertEqual(storage.all(State), {})
+        self.assertEqual(storage._FileStorage__by_class['State'], {})
+
+    def test_all_cls_reload(self):
+        """ Reloaded objects are indexed by class """
+        state = State()
+        storage.new(state)
+        storage.save()
+        self.setUp()
+        storage.reload()
+        self.assertEqual(list(storage.all(State)), ['State.' + state.id])
+        self.assertEqual(storage.all(BaseModel), {})
+
+    def test_iter(self):
+        """ Objects are yielded from the index """
+        state = State()
+        city = City()
+        storage.new(state)
+        storage.new(city)
+        self.assertEqual(list(storage.iter(State)), [state])
+        self.assertEqual(sorted(obj.id for obj in storage.iter()),
+                         sorted([state.id, city.id]))
+
+    def test_iter_lazy(self):
+        """ Undecoded records are yielded without being kept """
+        state = State(name="Utah")
+        storage.new(state)
+        storage.new(City())
+        storage.save()
+        self.setUp()
+        lazy = FileStorage(lazy=True)
+        lazy.reload()
+        states = list(lazy.iter('State'))
+        self.assertEqual([obj.name for obj in states], ["Utah"])
+        self.assertEqual(len(list(lazy.iter())), 2)
+        self.assertEqual(storage._FileStorage__objects, {})
+
+    def test_iter_shards(self):
+        """ Unread shards are streamed, objects in storage first """
+        sharded = FileStorage(shard_dir='shards')
+        state = State()
+        sharded.new(state)
+        sharded.new(State())
+        sharded.save()
+        self.setUp()
+        sharded.reload()
+        sharded.new(state)
+        self.assertEqual(len(list(sharded.iter(State))), 2)
+        self.assertIs(next(sharded.iter(State)), state)
+        self.assertIn('State', storage._FileStorage__shards)
+
+    def test_new_many(self):
+        """ Objects and dictionaries are added, then written once """
+        state = State(name="California")
+        city = City(name="Fresno", state_id=state.id)
+        writes = []
+        write = storage._FileStorage__write
+        storage._FileStorage__write = lambda: writes.append(write())
+        try:
+            count = storage.new_many(iter([state, city.to_dict()]))
+        finally:
+            del storage._FileStorage__write
+        self.assertEqual(count, 2)
+        self.assertEqual(len(writes), 1)
+        self.assertIs(storage.get(State, state.id), state)
+        self.assertEqual(storage.get(City, city.id).name, "Fresno")
+        with open('file.json') as f:
+            self.assertIn('City.' + city.id, json.load(f))
+
+    def test_get(self):
+        """ Objects are found by class and id """
+        state = State()
+        storage.new(state)
+        self.assertIs(storage.get(State, state.id), state)
+        self.assertIs(storage.get('State', state.id), state)
+        self.assertIsNone(storage.get(City, state.id))
+        self.assertIsNone(storage.get(State, 'missing'))
+
+    def test_count(self):
+        """ Objects are counted by class """
+        storage.new(State())
+        storage.new(City())
+        storage.new(City())
+        self.assertEqual(storage.count(), 3)
+        self.assertEqual(storage.count(City), 2)
+        self.assertEqual(storage.count('State'), 1)
+        self.assertEqual(storage.count(BaseModel), 0)
+
+    def test_get_count_lazy(self):
+        """ Lazy records are counted undecoded and decoded one by one """
+        state = State()
+        storage.new(state)
+        storage.new(State())
+        storage.new(City())
+        storage.save()
+        self.setUp()
+        lazy = FileStorage(lazy=True)
+        lazy.reload()
+        self.assertEqual(lazy.count(), 3)
+        self.assertEqual(lazy.count(State), 2)
+        self.assertEqual(storage._FileStorage__objects, {})
+        self.assertEqual(lazy.get(State, state.id).id, state.id)
+        self.assertEqual(list(storage._FileStorage__objects),
+                         ['State.' + state.id])
+        self.assertEqual(lazy.count(State), 2)
+
+    def test_related(self):
+        """ Objects are indexed by foreign key """
+        state = State()
+        other = State()
+        city = City(state_id=state.id)
+        storage.new(state)
+        storage.new(other)
+        storage.new(city)
+        self.assertEqual(storage.related(City, 'state_id', state.id),
+                         {'City.' + city.id: city})
+        self.assertEqual(state.cities, [city])
+        self.assertEqual(other.cities, [])
+        storage.delete(city)
+        self.assertEqual(state.cities, [])
+
+    def test_related_update(self):
+        """ An object stored again moves to its new foreign key """
+        state = State()
+        other = State()
+        city = City(state_id=state.id)
+        storage.new(city)
+        city.__dict__['state_id'] = other.id
+        self.assertEqual(state.cities, [])
+        city.save()
+        self.assertEqual(other.cities, [city])
+        self.assertEqual(storage._FileStorage__refs['City']['state_id'],
+                         {other.id: {'City.' + city.id: city}})
+
+    def test_related_reload(self):
+        """ Reloaded objects are indexed by foreign key """
+        state = State()
+        city = City(state_id=state.id)
+        storage.new(state)
+        storage.new(city)
+        storage.save()
+        self.setUp()
+        storage.reload()
+        cities = storage.all(State)['State.' + state.id].cities
+        self.assertEqual([obj.id for obj in cities], [city.id])
+
+    def test_close_unchanged(self):
+        """ Close does not parse the file again when it did not change """
+        state = State()
+        storage.new(state)
+        storage.save()
+        storage.close()
+        self.assertIs(storage.all()['State.' + state.id], state)
+        storage.reload(force=True)
+        self.assertIsNot(storage.all()['State.' + state.id], state)
+
+    def test_close_changed(self):
+        """ Close reads the file again once another process wrote it """
+        state = State(name="Maine")
+        storage.new(state)
+        storage.save()
+        with open('file.json') as f:
+            records = json.load(f)
+        records['State.' + state.id]['name'] = "Vermont"
+        with open('file.json', 'w') as f:
+            json.dump(records, f)
+            f.write(' ' * 10)
+        storage.close()
+        self.assertEqual(storage.all()['State.' + state.id].name, "Vermont")
+
+    def test_close_same_content(self):
+        """ A file rewritten with the same content is not parsed again """
+        state = State()
+        storage.new(state)
+        storage.save()
+        storage.reload(force=True)
+        loaded = storage.all()['State.' + state.id]
+        with open('file.json') as f:
+            text = f.read()
+        os.remove('file.json')
+        with open('file.json', 'w') as f:
+            f.write(text)
+        storage.close()
+        self.assertIs(storage.all()['State.' + state.id], loaded)
+
+    def test_version(self):
+        """ The version grows with each change and each file read """
+        version = storage.version()
+        state = State()
+        storage.new(state)
+        self.assertGreater(storage.version(), version)
+        version = storage.version()
+        storage.save()
+        self.assertGreater(storage.version(), version)
+        version = storage.version()
+        storage.close()
+        self.assertEqual(storage.version(), version)
+        storage.reload(force=True)
+        self.assertGreater(storage.version(), version)
+        version = storage.version()
+        storage.delete(state)
+        self.assertGreater(storage.version(), version)
+        version = storage.version()
+        storage.delete(state)
+        self.assertEqual(storage.version(), version)
+
+    def test_journal_append(self):
+        """ Journal mode appends changes instead of writing the file """
+        journal = FileStorage(journal=True)
+        state = State()
+        journal.new(state)
+        journal.save()
+        self.assertFalse(os.path.exists('file.json'))
+        with open('file.json.journal') as f:
+            lines = f.readlines()
+        self.assertEqual(len(lines), 1)
+        self.assertIn(state.id, lines[0])
+
+    def test_journal_reload(self):
+        """ Reload replays the journal on top of the snapshot """
+        journal = FileStorage(journal=True)
+        kept = State()
+        gone = State()
+        journal.new(kept)
+        journal.new(gone)
+        journal.save()
+        journal.delete(gone)
+        kept.name = "California"
+        journal.new(kept)
+        journal.save()
+        self.setUp()
+        journal.reload()
+        self.assertEqual(list(storage.all()), ['State.' + kept.id])
+        self.assertEqual(storage.all()['State.' + kept.id].name, "California")
+
+    def test_journal_changed(self):
+        """ An object changed without new() is journaled by save """
+        journal = FileStorage(journal=True)
+        state = State(name="CA")
+        journal.new(state)
+        journal.save()
+        state.name = "Changed"
+        journal.save()
+        with open('file.json.journal') as f:
+            self.assertEqual(len(f.readlines()), 2)
+        journal.save()
+        with open('file.json.journal') as f:
+            self.assertEqual(len(f.readlines()), 2)
+        self.setUp()
+        journal.reload()
+        self.assertEqual(storage.all()['State.' + state.id].name, "Changed")
+
+    def test_journal_torn_record(self):
+        """ A record torn by a crash is skipped on reload """
+        journal = FileStorage(journal=True)
+        state = State()
+        journal.new(state)
+        journal.save()
+        with open('file.json.journal', 'a') as f:
+            f.write('["State.torn", {"id": ')
+        other = State()
+        journal.new(other)
+        journal.save()
+        self.setUp()
+        journal.reload()
+        self.assertEqual(sorted(storage.all()),
+                         sorted(['State.' + state.id, 'State.' + other.id]))
+
+    def test_journal_compaction(self):
+        """ The journal is folded into the snapshot past its size limit """
+        journal = FileStorage(journal=True, journal_size=1)
+        state = State()
+        journal.new(state)
+        journal.save()
+        self.assertFalse(os.path.exists('file.json.journal'))
+        with open('file.json') as f:
+            self.assertIn('State.' + state.id, f.read())
+
+    def test_save_clears_dirty(self):
+        """ Saved objects are clean until an attribute is written """
+        state = State()
+        self.assertTrue(state._dirty)
+        storage.new(state)
+        storage.save()
+        self.assertFalse(state._dirty)
+        state.name = "Nevada"
+        self.assertTrue(state._dirty)
+        self.assertNotIn('_dirty', state.to_dict())
+
+    def test_save_reuses_clean_objects(self):
+        """ Clean objects are written from the cache, dirty ones encoded """
+        clean = State(name="Arizona")
+        dirty = State(name="Texas")
+        storage.new(clean)
+        storage.new(dirty)
+        storage.save()
+        clean.__dict__['name'] = "Not written"
+        dirty.name = "Utah"
+        storage.save()
+        self.setUp()
+        storage.reload()
+        self.assertEqual(storage.all()['State.' + clean.id].name, "Arizona")
+        self.assertEqual(storage.all()['State.' + dirty.id].name, "Utah")
+
+    def test_reload_clean(self):
+        """ Reloaded objects are clean and cached by the first save """
+        state = State(name="Arizona")
+        storage.new(state)
+        storage.save()
+        self.setUp()
+        storage.reload()
+        loaded = storage.all()['State.' + state.id]
+        self.assertFalse(loaded._dirty)
+        self.assertEqual(storage._FileStorage__encoded, {})
+        storage.save()
+        loaded.__dict__['name'] = "Not written"
+        storage.save()
+        self.setUp()
+        storage.reload()
+        self.assertEqual(storage.all()['State.' + state.id].name, "Arizona")
+
+    def test_write_behind_pending(self):
+        """ Write-behind saves are written after flush_pending saves """
+        behind = FileStorage(flush_interval=60, flush_pending=3)
+        for i in range(2):
+            behind.new(State())
+            behind.save()
+        self.assertFalse(os.path.exists('file.json'))
+        behind.new(State())
+        behind.save()
+        with open('file.json') as f:
+            self.assertEqual(len(json.load(f)), 3)
+
+    def test_write_behind_flush(self):
+        """ flush() writes the saves waiting in write-behind mode """
+        behind = FileStorage(flush_interval=60)
+        behind.new(State())
+        behind.save()
+        self.assertFalse(os.path.exists('file.json'))
+        behind.flush()
+        self.assertTrue(os.path.exists('file.json'))
+        self.assertIsNone(storage._FileStorage__timer)
+
+    def test_write_behind_interval(self):
+        """ The background flusher writes once the interval elapsed """
+        behind = FileStorage(flush_interval=0.05)
+        behind.new(State())
+        behind.save()
+        for i in range(100):
+            if os.path.exists('file.json'):
+                break
+            time.sleep(0.02)
+        self.assertTrue(os.path.exists('file.json'))
+        self.assertFalse(os.path.exists('file.json.tmp'))
+
+    def test_lazy_reload(self):
+        """ Lazy reload only builds the models of requested classes """
+        state = State(name="Ohio")
+        city = City(name="Columbus")
+        storage.new(state)
+        storage.new(city)
+        storage.save()
+        self.setUp()
+        lazy = FileStorage(lazy=True)
+        lazy.reload()
+        self.assertEqual(storage._FileStorage__objects, {})
+        states = lazy.all(State)
+        self.assertEqual(list(states), ['State.' + state.id])
+        self.assertEqual(list(storage._FileStorage__objects), list(states))
+        self.assertIs(lazy.all(State)['State.' + state.id],
+                      states['State.' + state.id])
+        self.assertEqual(len(lazy.all()), 2)
+        self.assertEqual(lazy.all()['City.' + city.id].name, "Columbus")
+
+    def test_lazy_save(self):
+        """ Records never requested are saved as they were read """
+        city = City(name="Columbus")
+        storage.new(city)
+        storage.save()
+        self.setUp()
+        lazy = FileStorage(lazy=True)
+        lazy.reload()
+        lazy.new(State(name="Ohio"))
+        lazy.save()
+        self.setUp()
+        storage.reload()
+        self.assertEqual(storage.all()['City.' + city.id].name, "Columbus")
+        self.assertEqual(len(storage.all(State)), 1)
+
+    def test_shards_save(self):
+        """ Each class is saved to its own shard """
+        sharded = FileStorage(shard_dir='shards')
+        sharded.new(State())
+        sharded.new(City())
+        sharded.save()
+        self.assertFalse(os.path.exists('file.json'))
+        self.assertEqual(sorted(os.listdir('shards')),
+                         ['City.json', 'State.json'])
+
+    def test_shards_save_changed(self):
+        """ Only the shards of changed classes are rewritten """
+        sharded = FileStorage(shard_dir='shards')
+        state = State(name="Iowa")
+        sharded.new(state)
+        sharded.new(City())
+        sharded.save()
+        os.remove(os.path.join('shards', 'City.json'))
+        state.name = "Idaho"
+        sharded.save()
+        self.assertEqual(os.listdir('shards'), ['State.json'])
+
+    def test_shards_reload_unchanged(self):
+        """ Shards read by reload are not rewritten by the next save """
+        sharded = FileStorage(shard_dir='shards')
+        sharded.new(State())
+        sharded.new(City())
+        sharded.save()
+        self.setUp()
+        sharded.reload()
+        sharded.all(State)
+        os.remove(os.path.join('shards', 'State.json'))
+        sharded.new(City())
+        sharded.save()
+        self.assertEqual(os.listdir('shards'), ['City.json'])
+
+    def test_shards_reload(self):
+        """ A shard is only read once its class is requested """
+        sharded = FileStorage(shard_dir='shards')
+        state = State()
+        city = City()
+        sharded.new(state)
+        sharded.new(city)
+        sharded.save()
+        self.setUp()
+        sharded.reload()
+        self.assertEqual(storage._FileStorage__objects, {})
+        self.assertEqual(list(sharded.all(State)), ['State.' + state.id])
+        self.assertNotIn('City.' + city.id, storage._FileStorage__objects)
+        sharded.new(State())
+        sharded.save()
+        self.setUp()
+        sharded.reload()
+        self.assertEqual(len(sharded.all()), 3)
+
+    def test_split_file(self):
+        """ A storage file is split into one shard per class """
+        state = State()
+        storage.new(state)
+        storage.new(City())
+        storage.new(City())
+        storage.save()
+        self.assertEqual(split_file('file.json', 'shards'), ['City', 'State'])
+        self.setUp()
+        sharded = FileStorage(shard_dir='shards')
+        sharded.reload()
+        self.assertEqual(len(sharded.all(City)), 2)
+        self.assertEqual(list(sharded.all(State)), ['State.' + state.id])
+
+    def test_binary_format(self):
+        """ The binary format is saved to file.bin and reloaded """
+        binary = FileStorage(codec='binary')
+        state = State(name="Oregon")
+        binary.new(state)
+        binary.save()
+        self.assertFalse(os.path.exists('file.json'))
+        self.assertTrue(os.path.exists('file.bin'))
+        self.setUp()
+        binary.reload()
+        self.assertEqual(binary.all()['State.' + state.id].to_dict(),
+                         state.to_dict())
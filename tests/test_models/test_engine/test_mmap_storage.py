@@ -0,0 +1,133 @@
+#!/usr/bin/python3
+""" Module for testing the memory-mapped storage"""
+import io
+import os
+import unittest
+from unittest import mock
+from models.engine.file_storage import FileStorage
+from models.engine.mmap_storage import MmapStorage
+from tests.test_models.test_engine import reset_file_storage
+from models.state import State
+from models.city import City
+
+
+class test_mmapStorage(unittest.TestCase):
+    """ Class to test the read-only memory-mapped storage """
+
+    def setUp(self):
+        """ Writes a snapshot holding a state and two cities """
+        self.writer = FileStorage(journal=False, flush_interval=0,
+                                  shard_dir='', codec='json')
+        reset_file_storage()
+        self.state = State(name="Zürich")
+        self.cities = [City(name="Bern", state_id=self.state.id),
+                       City(name="Basel", state_id=self.state.id)]
+        for obj in [self.state] + self.cities:
+            self.writer.new(obj)
+        self.writer.save()
+
+    def tearDown(self):
+        """ Removes the snapshot and its index """
+        for path in ('file.json', 'file.json.idx'):
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+
+    def test_all_cls(self):
+        """ Records are decoded from the mapping by class """
+        mapped = MmapStorage()
+        mapped.reload()
+        self.assertTrue(os.path.exists('file.json.idx'))
+        states = mapped.all(State)
+        self.assertEqual(list(states), ['State.' + self.state.id])
+        self.assertEqual(states['State.' + self.state.id].to_dict(),
+                         self.state.to_dict())
+        self.assertEqual(sorted(city.name for city in
+                                mapped.all('City').values()),
+                         ["Basel", "Bern"])
+        self.assertEqual(len(mapped.all()), 3)
+
+    def test_get_count(self):
+        """ Records are found by binary search and counted by class """
+        mapped = MmapStorage()
+        mapped.reload()
+        self.assertEqual(mapped.get(State, self.state.id).name, "Zürich")
+        for city in self.cities:
+            self.assertEqual(mapped.get('City', city.id).name, city.name)
+        self.assertIsNone(mapped.get(City, self.state.id))
+        self.assertIsNone(mapped.get(State, 'missing'))
+        self.assertEqual(mapped.count(), 3)
+        self.assertEqual(mapped.count(City), 2)
+        self.assertEqual(mapped.count('Place'), 0)
+
+    def test_related(self):
+        """ Foreign keys are found in the index, decoding only matches """
+        other = State(name="Vaud")
+        self.writer.new(other)
+        self.writer.new(City(name="Lausanne", state_id=other.id))
+        self.writer.save()
+        mapped = MmapStorage()
+        mapped.reload()
+        decode = MmapStorage._MmapStorage__decode
+        decoded = []
+
+        def record(storage, i):
+            """ Records the decoded entries """
+            decoded.append(i)
+            return decode(storage, i)
+
+        with mock.patch.object(MmapStorage, '_MmapStorage__decode', record):
+            cities = mapped.related(City, 'state_id', self.state.id)
+        self.assertEqual(sorted(cities),
+                         sorted('City.' + city.id for city in self.cities))
+        self.assertEqual(len(decoded), 2)
+        self.assertEqual(list(mapped.related('City', 'state_id', other.id)
+                              .values())[0].name, "Lausanne")
+        self.assertEqual(mapped.related(City, 'state_id', 'missing'), {})
+        self.assertEqual(mapped.related(State, 'state_id', other.id), {})
+        self.assertEqual(len(mapped.related(City, 'name', "Bern")), 1)
+
+    def test_iter(self):
+        """ Records are decoded one by one """
+        mapped = MmapStorage()
+        mapped.reload()
+        self.assertEqual(sorted(city.name for city in mapped.iter(City)),
+                         ["Basel", "Bern"])
+        self.assertEqual(len(list(mapped.iter())), 3)
+
+    def test_index_reused(self):
+        """ An index built from the same snapshot is not rebuilt """
+        MmapStorage().reload()
+        mtime = os.stat('file.json.idx').st_mtime_ns
+        mapped = MmapStorage()
+        mapped.reload()
+        self.assertEqual(os.stat('file.json.idx').st_mtime_ns, mtime)
+        self.assertEqual(len(mapped.all(City)), 2)
+
+    def test_close_replaced(self):
+        """ A replaced snapshot is mapped again on close """
+        mapped = MmapStorage()
+        mapped.reload()
+        self.writer.new(State(name="Geneva"))
+        self.writer.save()
+        mapped.close()
+        self.assertEqual(len(mapped.all(State)), 2)
+
+    def test_read_only(self):
+        """ Writes are refused """
+        mapped = MmapStorage()
+        mapped.reload()
+        with self.assertRaises(io.UnsupportedOperation):
+            mapped.new(State())
+        with self.assertRaises(io.UnsupportedOperation):
+            mapped.save()
+        with self.assertRaises(io.UnsupportedOperation):
+            mapped.delete(self.state)
+
+    def test_missing_snapshot(self):
+        """ A missing snapshot maps an empty storage """
+        os.remove('file.json')
+        mapped = MmapStorage()
+        mapped.reload()
+        self.assertEqual(mapped.all(), {})
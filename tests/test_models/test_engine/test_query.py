@@ -0,0 +1,247 @@
+#!/usr/bin/python3
+""" Module for testing storage queries"""
+import unittest
+from os import getenv
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+from models import storage
+from models.base_model import Base
+from models.city import City
+from models.place import Place
+from models.state import State
+from models.engine.cache import QueryCache
+# Importing the engine registers the tables of every model.
+from models.engine.db_storage import classes
+from models.engine.query import DBQuery, FileQuery
+from tests.test_models.test_engine import reset_file_storage
+
+
+@unittest.skipIf(getenv('HBNB_TYPE_STORAGE') == 'db', "FileStorage only")
+class test_fileQuery(unittest.TestCase):
+    """ Class to test queries over the file storage """
+
+    def setUp(self):
+        """ Stores three places in two cities """
+        reset_file_storage()
+        self.city = City(name="Austin")
+        other = City(name="Dallas")
+        self.places = [
+            Place(name="b", city_id=self.city.id, price_by_night=80),
+            Place(name="a", city_id=self.city.id, price_by_night=120),
+            Place(name="c", city_id=other.id, price_by_night=100)]
+        for obj in [self.city, other] + self.places:
+            storage.new(obj)
+
+    def tearDown(self):
+        """ Empties the storage """
+        reset_file_storage()
+
+    def names(self, query):
+        """ Returns the names of the places of a query """
+        return [place.name for place in query]
+
+    def test_aggregate(self):
+        """ Statistics are computed for each group """
+        stats = storage.query(Place).filter(price_by_night__gte=90) \
+            .aggregate('city_id', ['price_by_night'], ['avg', 'p50'])
+        self.assertEqual(len(stats), 2)
+        self.assertEqual(stats[self.city.id],
+                         {'count': 1, 'price_by_night':
+                          {'avg': 120.0, 'p50': 120.0}})
+        stats = storage.query(Place).aggregate(
+            'city_id', ['price_by_night', 'max_guest'],
+            ['min', 'max', 'avg', 'p25'])
+        self.assertEqual(stats[self.city.id]['count'], 2)
+        self.assertEqual(stats[self.city.id]['price_by_night'],
+                         {'min': 80.0, 'max': 120.0, 'avg': 100.0,
+                          'p25': 90.0})
+
+    def test_aggregate_state(self):
+        """ Places are grouped by the state of their city """
+        state = State(name="Texas")
+        self.city.state_id = state.id
+        storage.new(self.city)
+        stats = storage.query(Place).aggregate('state_id',
+                                               ['price_by_night'])
+        self.assertEqual(stats[state.id]['count'], 2)
+        self.assertEqual(stats[None]['count'], 1)
+        with self.assertRaises(ValueError):
+            storage.query(Place).aggregate('state_id', stats=['median'])
+
+    def test_page(self):
+        """ Pages follow each other through their cursors """
+        storage.new(Place(name="a", city_id=self.city.id))
+        query = storage.query(Place)
+        first = query.page(2)
+        self.assertEqual(self.names(first), ["a", "a"])
+        self.assertIsNone(first.prev)
+        second = query.page(2, first.next)
+        self.assertEqual(self.names(second), ["b", "c"])
+        self.assertIsNone(second.next)
+        back = query.page(2, second.prev)
+        self.assertEqual([p.id for p in back], [p.id for p in first])
+        self.assertIsNone(back.prev)
+        self.assertEqual(back.next, first.next)
+        self.assertEqual(self.names(query.filter(
+            city_id=self.city.id).page(2, first.next)), ["b"])
+
+    def test_page_cursor(self):
+        """ A cursor that was not returned by page() is refused """
+        for cursor in ("nope", "W10", "WyI-IiwgWzFdXQ"):
+            with self.assertRaises(ValueError):
+                storage.query(Place).page(2, cursor)
+
+    def test_page_cursor_types(self):
+        """ A cursor with values of the wrong type is refused """
+        # [">", [[1, 2], "x"]], [">", [true, "x"]], [">", [1, 2]] and
+        # [">", ["a", 1]]: the last two compare numbers with strings
+        for cursor in ("WyI-IiwgW1sxLCAyXSwgIngiXV0",
+                       "WyI-IiwgW3RydWUsICJ4Il1d",
+                       "WyI-IiwgWzEsIDJdXQ", "WyI-IiwgWyJhIiwgMV1d"):
+            with self.assertRaises(ValueError):
+                storage.query(Place).page(2, cursor)
+
+    def test_query(self):
+        """ A query with no criteria returns every object of the class """
+        self.assertIsInstance(storage.query(Place), FileQuery)
+        self.assertEqual(sorted(self.names(storage.query('Place'))),
+                         ["a", "b", "c"])
+
+    def test_filter(self):
+        """ Criteria are combined """
+        query = storage.query(Place).filter(city_id=self.city.id)
+        self.assertEqual(sorted(self.names(query)), ["a", "b"])
+        query = query.filter(price_by_night__gte=100)
+        self.assertEqual(self.names(query), ["a"])
+        query = storage.query(Place).filter(name__in=["a", "c"],
+                                            price_by_night__lt=110)
+        self.assertEqual(self.names(query), ["c"])
+        self.assertEqual(self.names(storage.query(Place).filter(
+            description=None).filter(name__ne="b").order_by('name')),
+            ["a", "c"])
+
+    def test_filter_unknown(self):
+        """ An unknown comparison raises ValueError """
+        with self.assertRaises(ValueError):
+            storage.query(Place).filter(name__like="a")
+
+    def test_order_limit(self):
+        """ Results are ordered, then sliced """
+        query = storage.query(Place).order_by('-price_by_night')
+        self.assertEqual(self.names(query), ["a", "c", "b"])
+        self.assertEqual(self.names(query.limit(2)), ["a", "c"])
+        self.assertEqual(self.names(query.offset(1).limit(1)), ["c"])
+        self.assertEqual(self.names(query.offset(2)), ["b"])
+        self.assertEqual(query.first().name, "a")
+        self.assertEqual(self.names(storage.query(Place).order_by(
+            'city_id', '-name').filter(city_id=self.city.id)), ["b", "a"])
+
+    def test_load(self):
+        """ Loading profiles are checked, then ignored in file mode """
+        query = storage.query(Place).load('user', 'reviews')
+        self.assertEqual(sorted(self.names(query)), ["a", "b", "c"])
+        with self.assertRaises(ValueError):
+            storage.query(Place).load('owner')
+
+    def test_first_none(self):
+        """ first() returns None when nothing matches """
+        self.assertIsNone(storage.query(Place).filter(name="z").first())
+
+
+class test_dbQuery(unittest.TestCase):
+    """ Class to test the SQL compilation of queries """
+
+    def setUp(self):
+        """ Stores three states in an in-memory SQLite database """
+        engine = create_engine('sqlite://')
+        Base.metadata.create_all(engine)
+        self.session = sessionmaker(bind=engine)()
+        for name in ("California", "Arizona", "Nevada"):
+            self.session.add(State(name=name))
+        self.session.commit()
+
+    def tearDown(self):
+        """ Closes the session """
+        self.session.close()
+
+    def test_statement(self):
+        """ Criteria compile to WHERE, ORDER BY and LIMIT clauses """
+        query = DBQuery(self.session, State).filter(
+            name__ne="Arizona").order_by('-name').limit(1)
+        sql = str(query.statement())
+        self.assertIn("WHERE states.name !=", sql)
+        self.assertIn("ORDER BY states.name DESC", sql)
+        self.assertIn("LIMIT", sql)
+        self.assertEqual([state.name for state in query], ["Nevada"])
+
+    def test_in_offset(self):
+        """ In criteria and offsets run in SQL """
+        query = DBQuery(self.session, State).filter(
+            name__in=["Arizona", "Nevada"]).order_by('name').offset(1)
+        self.assertEqual([state.name for state in query], ["Nevada"])
+        self.assertIsNone(DBQuery(self.session, State).filter(
+            name="Texas").first())
+
+    def test_load(self):
+        """ Loading profiles of other classes add no option """
+        query = DBQuery(self.session, State).load('user')
+        self.assertEqual(len(query.all()), 3)
+
+    def test_cache(self):
+        """ Cached results are read until their class is invalidated """
+        cache = QueryCache()
+        query = DBQuery(self.session, State, cache).order_by('name')
+        self.assertEqual(len(query.all()), 3)
+        self.session.add(State(name="Texas"))
+        self.session.commit()
+        self.assertEqual(len(query.all()), 3)
+        self.assertEqual(len(query.limit(2).all()), 2)
+        cache.invalidate('City')
+        self.assertEqual(len(query.all()), 3)
+        cache.invalidate('State')
+        self.assertEqual(len(query.all()), 4)
+        self.assertEqual(cache.hits, 2)
+
+    def test_page(self):
+        """ Pages seek past the last row instead of using OFFSET """
+        query = DBQuery(self.session, State)
+        first = query.page(2)
+        self.assertEqual([state.name for state in first],
+                         ["Arizona", "California"])
+        second = query.page(2, first.next)
+        self.assertEqual([state.name for state in second], ["Nevada"])
+        self.assertIsNone(second.next)
+        self.assertEqual([state.name for state in
+                          query.page(2, second.prev)],
+                         ["Arizona", "California"])
+        statements = []
+        event.listen(self.session.bind, 'before_cursor_execute',
+                     lambda conn, cursor, statement, *args:
+                     statements.append(statement))
+        query.page(2, first.next)
+        self.assertIn("WHERE states.name >= ? AND (states.name > ? OR "
+                      "states.name = ? AND states.id > ?)", statements[0])
+
+    def test_aggregate(self):
+        """ Statistics are computed by GROUP BY """
+        states = {state.name: state for state in self.session.query(State)}
+        cities = [City(name="Fresno", state_id=states["California"].id),
+                  City(name="Napa", state_id=states["California"].id),
+                  City(name="Tucson", state_id=states["Arizona"].id)]
+        places = [Place(name=str(price), city_id=city.id, user_id="u",
+                        price_by_night=price)
+                  for city, price in zip(cities * 2, (80, 100, 60, 120,
+                                                      140, 90))]
+        self.session.add_all(cities + places)
+        self.session.commit()
+        stats = DBQuery(self.session, Place).aggregate(
+            'state_id', ['price_by_night'], ['min', 'max', 'avg', 'p50'])
+        self.assertEqual(stats[states["California"].id],
+                         {'count': 4, 'price_by_night':
+                          {'min': 80.0, 'max': 140.0, 'avg': 110.0,
+                           'p50': 110.0}})
+        self.assertEqual(stats[states["Arizona"].id]['count'], 2)
+        stats = DBQuery(self.session, Place).filter(
+            price_by_night__lt=100).aggregate('city_id', ['price_by_night'])
+        self.assertEqual(stats[cities[0].id]['count'], 1)
+        self.assertEqual(stats[cities[2].id]['price_by_night']['max'], 90.0)
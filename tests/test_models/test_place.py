@@ -2,6 +2,11 @@
 """ """
 from tests.test_models.test_base_model import test_basemodel
 from models.place import Place
+from models.amenity import Amenity
+from models.review import Review
+from models import storage
+from os import getenv
+import unittest
 
 
 class test_Place(test_basemodel):
@@ -66,4 +71,31 @@ class test_Place(test_basemodel):
     def test_amenity_ids(self):
         """ """
         new = self.value()
-        self.assertEqual(type(new.amenity_ids), list)
+        self.assertEqual(type(new.amenity_ids), set)
+
+    @unittest.skipIf(getenv('HBNB_TYPE_STORAGE') == 'db', "FileStorage only")
+    def test_amenity_ids_per_instance(self):
+        """ Each place owns its amenity ids """
+        new = self.value()
+        other = self.value()
+        new.amenities = Amenity()
+        self.assertEqual(len(new.amenity_ids), 1)
+        self.assertEqual(other.amenity_ids, set())
+
+    def test_amenity_ids_to_dict(self):
+        """ Amenity ids are stored as a list and read back as a set """
+        new = self.value()
+        new.amenity_ids = {"b", "a"}
+        copy = new.to_dict()
+        self.assertEqual(copy['amenity_ids'], ["a", "b"])
+        self.assertEqual(self.value(**copy).amenity_ids, {"a", "b"})
+
+    @unittest.skipIf(getenv('HBNB_TYPE_STORAGE') == 'db', "FileStorage only")
+    def test_reviews(self):
+        """ Reviews are found through the place_id index """
+        new = self.value()
+        review = Review(place_id=new.id)
+        storage.new(review)
+        self.assertEqual(new.reviews, [review])
+        storage.delete(review)
+        self.assertEqual(new.reviews, [])
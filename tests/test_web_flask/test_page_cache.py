@@ -0,0 +1,150 @@
+#!/usr/bin/python3
+""" Module for testing the page cache of the web_flask views"""
+import importlib
+import os
+import unittest
+from os import getenv
+from unittest import mock
+from flask import Flask, request
+from models import storage
+from models.state import State
+from web_flask import page_cache
+
+
+class test_pageCache(unittest.TestCase):
+    """ Class to test the page cache """
+
+    def setUp(self):
+        """ Creates an app of one cached view, over a storage version """
+        page_cache.clear()
+        self.version = 0
+        self.renders = []
+        patches = [mock.patch.object(page_cache, 'size', 2),
+                   mock.patch.object(page_cache, 'ttl', 0),
+                   mock.patch.object(page_cache, 'storage')]
+        for patch in patches:
+            patch.start()
+            self.addCleanup(patch.stop)
+        page_cache.storage.version.side_effect = lambda: self.version
+        self.addCleanup(page_cache.clear)
+        app = Flask(__name__)
+
+        @app.route("/states/<name>")
+        @page_cache.cached
+        def states(name):
+            """ Renders a page recording its calls """
+            self.renders.append(name)
+            return "{} {} {}".format(name, request.args.get('cursor'),
+                                     len(self.renders))
+
+        self.client = app.test_client()
+
+    def get(self, url):
+        """ Returns the text of the page at url """
+        return self.client.get(url).get_data(as_text=True)
+
+    def test_hit(self):
+        """ A page is only rendered once """
+        self.assertEqual(self.get('/states/a'), "a None 1")
+        self.assertEqual(self.get('/states/a'), "a None 1")
+        self.assertEqual(self.renders, ['a'])
+        self.assertEqual(page_cache.stats(),
+                         {'/states/<name>': {'hits': 1, 'misses': 1}})
+
+    def test_key(self):
+        """ Pages differ by path and query string """
+        self.get('/states/a')
+        self.get('/states/b')
+        self.assertEqual(self.get('/states/a?cursor=x'), "a x 3")
+        self.assertEqual(self.renders, ['a', 'b', 'a'])
+
+    def test_version(self):
+        """ A change to the storage makes the pages stale """
+        self.get('/states/a')
+        self.version += 1
+        self.assertEqual(self.get('/states/a'), "a None 2")
+        self.assertEqual(self.get('/states/a'), "a None 2")
+
+    def test_ttl(self):
+        """ A page older than the TTL is rendered again """
+        self.get('/states/a')
+        with mock.patch.object(page_cache, 'ttl', 60), \
+                mock.patch.object(page_cache, 'monotonic',
+                                  return_value=1e9):
+            self.assertEqual(self.get('/states/a'), "a None 2")
+
+    def test_eviction(self):
+        """ The least recently used page is dropped """
+        self.get('/states/a')
+        self.get('/states/b')
+        self.get('/states/a')
+        self.get('/states/c')
+        self.assertEqual(len(page_cache.pages), 2)
+        self.get('/states/a')
+        self.get('/states/b')
+        self.assertEqual(self.renders, ['a', 'b', 'c', 'b'])
+
+    def test_disabled(self):
+        """ A size of 0 renders every page """
+        with mock.patch.object(page_cache, 'size', 0):
+            self.get('/states/a')
+            self.get('/states/a')
+        self.assertEqual(self.renders, ['a', 'a'])
+        self.assertEqual(page_cache.stats(), {})
+
+
+@unittest.skipIf(getenv('HBNB_TYPE_STORAGE') == 'db', "FileStorage only")
+class test_statesList(unittest.TestCase):
+    """ Class to test the cached states_list view """
+
+    def setUp(self):
+        """ Clears the page cache """
+        page_cache.clear()
+        self.client = importlib.import_module(
+            'web_flask.7-states_list').app.test_client()
+
+    def tearDown(self):
+        """ Removes the storage file and the pages """
+        page_cache.clear()
+        try:
+            os.remove('file.json')
+        except FileNotFoundError:
+            pass
+
+    def test_new_state(self):
+        """ A saved state is listed at the next request """
+        state = State(name="Zzyzx")
+        self.assertNotIn(b"Zzyzx", self.client.get('/states_list').data)
+        self.client.get('/states_list')
+        storage.new(state)
+        storage.save()
+        self.assertIn(b"Zzyzx", self.client.get('/states_list').data)
+        self.assertEqual(page_cache.stats(),
+                         {'/states_list': {'hits': 1, 'misses': 2}})
+        storage.delete(state)
+        storage.save()
+
+
+@unittest.skipIf(getenv('HBNB_TYPE_STORAGE') == 'db', "FileStorage only")
+class test_states(unittest.TestCase):
+    """ Class to test the paged states view """
+
+    def setUp(self):
+        """ Stores a state and clears the page cache """
+        page_cache.clear()
+        self.client = importlib.import_module(
+            'web_flask.9-states').app.test_client()
+        self.state = State(name="Zzyzx")
+        storage.new(self.state)
+
+    def tearDown(self):
+        """ Removes the state and the pages """
+        page_cache.clear()
+        storage.delete(self.state)
+
+    def test_cursor_types(self):
+        """ A cursor of numbers is refused instead of failing """
+        # [">", [1, 2]]
+        self.assertEqual(
+            self.client.get('/states?cursor=WyI-IiwgWzEsIDJdXQ')
+            .status_code, 400)
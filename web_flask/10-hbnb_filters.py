@@ -15,7 +15,7 @@ Endpoints:
 
         This endpoint queries the database for all State and Amenity objects,
         sorts them alphabetically by name, and renders a template to display
-        the sorted lists.
+        the sorted lists. The page is cached by web_flask.page_cache.
 
 Returns:
     str: Rendered HTML template with the sorted lists of states and amenities.
@@ -25,11 +25,13 @@ from flask import Flask, render_template
 from models import storage
 from models.state import State
 from models.amenity import Amenity
+from web_flask.page_cache import cached
 
 app = Flask(__name__)
 
 
 @app.route("/hbnb_filters", strict_slashes=False)
+@cached
 def hbnb_filters():
     """
     Displays a sorted list of all State and Amenity objects.
@@ -42,11 +44,8 @@ def hbnb_filters():
         str: Rendered HTML template with the sorted lists of states and
         amenities.
     """
-    states = storage.all(State).values()
-    amenities = storage.all(Amenity).values()
-
-    states = sorted(states, key=lambda x: x.name)
-    amenities = sorted(amenities, key=lambda x: x.name)
+    states = storage.query(State).load('cities').order_by('name').all()
+    amenities = storage.query(Amenity).order_by('name').all()
 
     return render_template('10-hbnb_filters.html',
                            states=states, amenities=amenities)
@@ -12,32 +12,44 @@ Usage:
 Routes:
     /hbnb:
         Displays the main HBnB filters HTML page, including states, amenities,
-        and places fetched from storage.
+        and places fetched from storage, HBNB_PAGE_SIZE (100) places per
+        page. The pages are cached by web_flask.page_cache.
 """
 
+from os import getenv
 from models import storage
-from flask import Flask, render_template
+from flask import Flask, abort, render_template, request
+from web_flask.page_cache import cached
 
 app = Flask(__name__)
+PAGE_SIZE = int(getenv('HBNB_PAGE_SIZE', 100))
 
 
 @app.route("/hbnb", strict_slashes=False)
+@cached
 def hbnb():
     """
     Displays the main HBnB filters HTML page.
 
-    This view function queries the storage for all State, Amenity, and Place
-    objects and renders a template to display them.
+    This view function queries the storage for all State and Amenity
+    objects and for a page of Place objects, starting at the ``cursor``
+    query parameter, sorted by name, and renders a template to display
+    them with links to the previous and next pages of places.
 
     Returns:
         str: Rendered HTML template with lists of states, amenities,
         and places.
     """
-    states = storage.all("State")
-    amenities = storage.all("Amenity")
-    places = storage.all("Place")
-    return render_template("100-hbnb.html",
-                           states=states, amenities=amenities, places=places)
+    states = storage.query("State").load('cities').order_by('name').all()
+    amenities = storage.query("Amenity").order_by('name').all()
+    try:
+        page = storage.query("Place").load(
+            'user', 'amenities', 'reviews').page(
+                PAGE_SIZE, request.args.get('cursor'))
+    except ValueError:
+        abort(400)
+    return render_template("100-hbnb.html", states=states,
+                           amenities=amenities, places=page.items, page=page)
 
 
 @app.teardown_appcontext
@@ -11,30 +11,31 @@ Usage:
 
 Endpoints:
     /states_list: Displays a list of all State objects present in storage.
+        The page is cached by web_flask.page_cache.
 """
 from flask import Flask, render_template
 from models import storage
 from models.state import State
+from web_flask.page_cache import cached
 
 
 app = Flask(__name__)
 
 
 @app.route("/states_list", strict_slashes=False)
+@cached
 def state_list():
     """
     Displays a list of all State objects.
 
-    This view function queries the storage for all State objects, then
-    renders a template to display the list of states.
+    This view function queries the storage for all State objects, sorted
+    by name, then renders a template to display the list of states.
 
     Returns:
         str: Rendered HTML template with the list of states.
     """
-    # Retrieve all State objects from storage
-    states = storage.all(State).values()
-    # Sorting states by name
-    states = sorted(states, key=lambda x: x.name)
+    # Retrieve all State objects from storage, sorted by name
+    states = storage.query(State).order_by('name').all()
     return render_template("7-states_list.html", states=states)
 
 
@@ -11,31 +11,42 @@ Usage:
 
 Endpoints:
     /cities_by_states:
-        Displays a sorted list of all State objects present in storage.
+        Displays a sorted list of all State objects present in storage,
+        HBNB_PAGE_SIZE (100) states per page. The pages are cached by
+        web_flask.page_cache.
 """
 
-from flask import Flask, render_template
+from os import getenv
+from flask import Flask, abort, render_template, request
 from models import storage
 from models.state import State
+from web_flask.page_cache import cached
 
 app = Flask(__name__)
+PAGE_SIZE = int(getenv('HBNB_PAGE_SIZE', 100))
 
 
 @app.route("/cities_by_states", strict_slashes=False)
+@cached
 def cities_by_states():
     """
     Displays a sorted list of all State objects.
 
-    This view function queries the storage for all State objects, then
-    sorts them alphabetically by state name. It renders a template to
-    display the sorted list of states.
+    This view function queries the storage for a page of State objects,
+    sorted alphabetically by state name, starting at the ``cursor`` query
+    parameter. It renders a template to display the page of states with
+    links to the previous and next pages.
 
     Returns:
         str: Rendered HTML template with the list of states.
     """
-    states = storage.all(State).values()
-    states = sorted(states, key=lambda x: x.name)
-    return render_template("8-cities_by_states.html", states=states)
+    try:
+        page = storage.query(State).load('cities').page(
+            PAGE_SIZE, request.args.get('cursor'))
+    except ValueError:
+        abort(400)
+    return render_template("8-cities_by_states.html",
+                           states=page.items, page=page)
 
 
 @app.teardown_appcontext
@@ -11,15 +11,18 @@ Usage:
 
 Endpoints:
     /states:
-        Displays a sorted list of all State objects present in storage.
+        Displays a sorted list of all State objects present in storage,
+        HBNB_PAGE_SIZE (100) states per page.
     /states/<id>:
         Displays the details of a State object with the specified ID.
 """
+from os import getenv
 from models import storage
-from flask import Flask, render_template
+from flask import Flask, abort, render_template, request
 from models.state import State
 
 app = Flask(__name__)
+PAGE_SIZE = int(getenv('HBNB_PAGE_SIZE', 100))
 
 
 @app.route('/states', strict_slashes=False)
@@ -27,16 +30,20 @@ def states():
     """
     Displays a sorted list of all State objects.
 
-    This view function queries the storage for all State objects, sorts them
-    alphabetically by state name, and renders a template to display the sorted
-    list of states.
+    This view function queries the storage for a page of State objects,
+    sorted alphabetically by state name, starting at the ``cursor`` query
+    parameter, and renders a template to display the page with links to
+    the previous and next pages.
 
     Returns:
         str: Rendered HTML template with the list of states.
     """
-    states = storage.all(State).values()
-    states = sorted(states, key=lambda x: x.name)
-    return render_template('9-states.html', states=states)
+    try:
+        page = storage.query(State).page(PAGE_SIZE,
+                                         request.args.get('cursor'))
+    except ValueError:
+        abort(400)
+    return render_template('9-states.html', states=page.items, page=page)
 
 
 @app.route('/states/<id>', strict_slashes=False)
@@ -54,9 +61,9 @@ def states_id(id):
         str: Rendered HTML template with the details of the State object, or
         a template with no state if the ID is not found.
     """
-    for state in storage.all(State).values():
-        if state.id == id:
-            return render_template('9-states.html', state=state)
+    state = storage.get(State, id)
+    if state:
+        return render_template('9-states.html', state=state)
     return render_template('9-states.html')
 
 
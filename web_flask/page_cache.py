@@ -0,0 +1,100 @@
+#!/usr/bin/python3
+"""
+Caches the pages rendered by the web_flask views.
+
+A page is kept under its view, path and query string, and served again
+until the version of the storage changes: every new(), save() and
+delete() of the storage makes the pages rendered before it stale. Up to
+HBNB_PAGE_CACHE_SIZE (128) pages are kept, the least recently used one
+being dropped first; 0 turns the cache off. With DBStorage, changes made
+by other processes are not counted by the version, so a page is also
+rendered again once it is older than HBNB_PAGE_CACHE_TTL (60) seconds,
+or never with 0.
+
+Usage:
+    Decorate a view under its route:
+
+    @app.route("/states_list", strict_slashes=False)
+    @cached
+    def state_list():
+        ...
+
+Functions:
+    cached: Decorates a view to cache the pages it renders.
+    stats: Returns the hits and misses of each route.
+    clear: Drops every page.
+"""
+import threading
+from collections import OrderedDict
+from functools import wraps
+from os import getenv
+from time import monotonic
+from flask import request
+from models import storage
+
+size = int(getenv('HBNB_PAGE_CACHE_SIZE', 128))
+ttl = float(getenv('HBNB_PAGE_CACHE_TTL', 60))
+pages = OrderedDict()
+counters = {}
+lock = threading.Lock()
+
+
+def cached(view):
+    """
+    Decorates a view to cache the pages it renders.
+
+    Args:
+        view (function): The view, returning the rendered page.
+
+    Returns:
+        function: The view serving the cached pages.
+    """
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        """Serves the cached page, or renders and caches it."""
+        if not size:
+            return view(*args, **kwargs)
+        key = (view.__module__, view.__name__, request.path,
+               tuple(sorted(request.args.items(multi=True))))
+        route = request.url_rule.rule
+        # Read first, so that a change made while rendering makes the page
+        # stale.
+        version = storage.version()
+        with lock:
+            count = counters.setdefault(route, {'hits': 0, 'misses': 0})
+            entry = pages.get(key)
+            if (entry is not None and entry[0] == version and
+                    (not ttl or monotonic() - entry[1] <= ttl)):
+                pages.move_to_end(key)
+                count['hits'] += 1
+                return entry[2]
+            count['misses'] += 1
+        page = view(*args, **kwargs)
+        with lock:
+            pages[key] = (version, monotonic(), page)
+            pages.move_to_end(key)
+            while len(pages) > size:
+                pages.popitem(last=False)
+        return page
+    return wrapper
+
+
+def stats():
+    """
+    Returns the hits and misses of each route.
+
+    Returns:
+        dict: For each route, such as ``/hbnb``, the dictionary of its
+        ``hits`` and ``misses``.
+    """
+    with lock:
+        return {route: dict(count) for route, count in counters.items()}
+
+
+def clear():
+    """
+    Drops every page and resets the counters.
+    """
+    with lock:
+        pages.clear()
+        counters.clear()